@@ -0,0 +1,361 @@
+"""Deterministic offline stand-ins for the chat model, embeddings and image API.
+
+Nothing here talks to the network: the chat model follows a fixed script for
+each agent (chosen by the tools it is bound to), embeddings are hashed bag
+of words, and images are small generated PNGs. Every stand-in takes a
+latency so benchmarks can model a slow or fast provider.
+"""
+import base64
+import hashlib
+import json
+import math
+import re
+import struct
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+from unittest import mock
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+ROOT = Path(__file__).parent.parent
+for folder in ("clase_1", "clase_2", "clase_3", "shared", "multi_agents_example"):
+    sys.path.append(str(ROOT / folder))
+
+
+# Scripted chat model
+
+def _text(message):
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+def _count_tokens(text):
+    return len(text.split())
+
+
+def _since_last_human(messages):
+    """Messages produced after the most recent user message."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return _text(messages[i]), messages[i + 1:]
+    return "", messages
+
+
+def _last_tool_output(turn):
+    for message in reversed(turn):
+        if isinstance(message, ToolMessage):
+            return _text(message)
+    return ""
+
+
+# Questions the SQL scenario asks, with the query the fake model "writes" for each
+SQL_QUESTIONS = {
+    "How many albums are there?": "SELECT COUNT(*) FROM Album",
+    "Which 5 artists have the most albums?":
+        "SELECT Artist.Name, COUNT(*) AS n FROM Album JOIN Artist USING (ArtistId) "
+        "GROUP BY Artist.Name ORDER BY n DESC LIMIT 5",
+    "What are the 5 longest tracks?":
+        "SELECT Name, Milliseconds FROM Track ORDER BY Milliseconds DESC LIMIT 5",
+    "Which country has the most invoices?":
+        "SELECT BillingCountry, COUNT(*) AS n FROM Invoice GROUP BY BillingCountry ORDER BY n DESC LIMIT 1",
+    "What is the total revenue per genre? Show the top 5.":
+        "SELECT Genre.Name, SUM(InvoiceLine.UnitPrice * InvoiceLine.Quantity) AS revenue "
+        "FROM InvoiceLine JOIN Track USING (TrackId) JOIN Genre USING (GenreId) "
+        "GROUP BY Genre.Name ORDER BY revenue DESC LIMIT 5",
+}
+
+_ALBUMS_BY_ARTIST = re.compile(r"album titles by the artist '(.+?)'")
+_COVER_REQUEST = re.compile(r"Generate an? (\w+) album cover for the album '(.+)' by (.+)$")
+
+
+def sql_script(question, turn):
+    """list tables -> schema -> query -> answer, like the real SQL agent prompt asks for."""
+    step = sum(isinstance(m, ToolMessage) for m in turn)
+    if step == 0:
+        return {"name": "sql_db_list_tables", "args": {"tool_input": ""}}
+    if step == 1:
+        return {"name": "sql_db_schema", "args": {"table_names": "Album, Artist, Track"}}
+    if step == 2:
+        match = _ALBUMS_BY_ARTIST.search(question)
+        if match:
+            artist = match.group(1).replace("'", "''")
+            query = (f"SELECT Album.Title FROM Album JOIN Artist USING (ArtistId) "
+                     f"WHERE Artist.Name = '{artist}'")
+        else:
+            query = SQL_QUESTIONS.get(question, "SELECT COUNT(*) FROM Album")
+        return {"name": "sql_db_query", "args": {"query": query}}
+    return f"Here is what I found:\n{_last_tool_output(turn)}"
+
+
+def rag_script(question, turn):
+    if not any(isinstance(m, ToolMessage) for m in turn):
+        return {"name": "retrieve_context", "args": {"query": question}}
+    return f"According to the manual: {_last_tool_output(turn)[:300]}"
+
+
+def image_script(question, turn):
+    if not any(isinstance(m, ToolMessage) for m in turn):
+        match = _COVER_REQUEST.search(question)
+        style, album, artist = match.groups() if match else ("alternative", question, "Unknown")
+        return {"name": "generate_album_cover", "args": {"artist": artist, "album": album, "style": style}}
+    return _last_tool_output(turn)
+
+
+def agent_script(messages, tool_names):
+    """Pick the script for whichever agent this model is bound into."""
+    question, turn = _since_last_human(messages)
+    if "generate_album_cover" in tool_names:
+        return image_script(question, turn)
+    if "retrieve_context" in tool_names:
+        return rag_script(question, turn)
+    if "sql_db_query" in tool_names:
+        return sql_script(question, turn)
+    return "OK"
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that answers from a script instead of an API.
+
+    Args:
+        script: `script(messages, tool_names)` returning either the answer text
+            or a tool call as {"name": ..., "args": {...}}
+        latency: Seconds to wait before the first token
+        token_latency: Seconds per generated token
+        temperature: Only reported to the response cache; the script is deterministic
+    """
+
+    script: Callable[..., Any] = agent_script
+    latency: float = 0.0
+    token_latency: float = 0.0
+    temperature: float = 0.0
+    model_name: str = "scripted-fake"
+    tool_names: tuple = ()
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def _identifying_params(self):
+        return {"model_name": self.model_name, "temperature": self.temperature, "tool_names": self.tool_names}
+
+    def bind_tools(self, tools, **kwargs):
+        names = tuple(getattr(t, "name", None) or t.get("name") for t in tools)
+        return self.model_copy(update={"tool_names": names})
+
+    def _respond(self, messages) -> AIMessage:
+        reply = self.script(messages, self.tool_names)
+        prompt_tokens = sum(_count_tokens(_text(m)) for m in messages)
+        if isinstance(reply, dict):
+            tool_call = {"name": reply["name"], "args": reply["args"], "id": f"call_{len(messages)}"}
+            completion_tokens = _count_tokens(json.dumps(reply["args"])) + 1
+            message = AIMessage(content="", tool_calls=[tool_call])
+        else:
+            completion_tokens = _count_tokens(reply)
+            message = AIMessage(content=reply)
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._respond(messages)
+        time.sleep(self.latency + self.token_latency * message.usage_metadata["output_tokens"])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._respond(messages)
+        time.sleep(self.latency)
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            time.sleep(self.token_latency * message.usage_metadata["output_tokens"])
+            chunks = [AIMessageChunk(content="", tool_call_chunks=[{
+                "name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0,
+            }])]
+        else:
+            chunks = [AIMessageChunk(content=word) for word in re.findall(r"\S+\s*|\s+", message.content)]
+        chunks = chunks or [AIMessageChunk(content="")]
+        chunks[-1].usage_metadata = message.usage_metadata
+        for chunk in chunks:
+            if chunk.content:
+                time.sleep(self.token_latency)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+
+# Embeddings
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words feature hashing: deterministic, and similar texts get similar vectors."""
+
+    def __init__(self, size=384, latency=0.0):
+        self.size = size
+        self.latency = latency
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.size
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return self._embed(text)
+
+
+# Image generation
+
+def make_png(seed: str, size=64) -> bytes:
+    """A small gradient PNG whose colours are derived from `seed`."""
+    r, g, b = hashlib.sha256(seed.encode()).digest()[:3]
+    rows = b"".join(
+        b"\x00" + bytes(
+            channel
+            for x in range(size)
+            for channel in ((r + x) % 256, (g + y) % 256, (b + x + y) % 256)
+        )
+        for y in range(size)
+    )
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+class FakeImageClient:
+    """Quacks like `openai.OpenAI()` for `client.images.generate(...)`."""
+
+    def __init__(self, latency=0.0, size=64):
+        self.latency = latency
+        self.size = size
+        self.images = self
+        self.calls = 0
+
+    def generate(self, model, prompt, n=1, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        image = base64.b64encode(make_png(prompt, self.size)).decode()
+        return SimpleNamespace(data=[SimpleNamespace(b64_json=image) for _ in range(n)])
+
+
+# PDFs for the RAG scenario
+
+def make_pdf(path, pages: list[str]):
+    """Write a minimal text-only PDF (Helvetica, one text block per page)."""
+    def escape(line):
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in pages:
+        lines = "\n".join(f"({escape(line)}) '" for line in text.splitlines())
+        stream = f"BT /F1 10 Tf 14 TL 40 800 Td\n{lines}\nET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    Path(path).write_bytes(bytes(out))
+
+
+MANUAL_TOPICS = {
+    "Tire pressure": "Check the tire pressure monthly when the tires are cold. The recommended pressure is on the label on the driver side door pillar.",
+    "Engine oil": "Change the engine oil and filter every 5000 miles. Use SAE 0W-20 oil and check the level with the dipstick on level ground.",
+    "Towing": "The maximum towing capacity depends on the configuration. Use the tow hitch receiver and connect the trailer wiring harness.",
+    "Four wheel drive": "Use the 4WD switch to select 2WD, 4H or 4LO. Stop the vehicle and shift to neutral before selecting 4LO.",
+    "Warning lights": "If the brake warning light stays on, the brake fluid may be low. The check engine light indicates an emissions fault.",
+    "Battery": "To jump start the vehicle connect the positive cable first, then the negative cable to a ground point away from the battery.",
+    "Child safety": "Install child restraints in the rear seat using the LATCH anchors. Never place a rear facing seat in front of an airbag.",
+    "Infotainment": "Pair a phone with Bluetooth from the settings menu. Apple CarPlay and Android Auto connect through the USB port.",
+}
+
+RAG_QUESTIONS = [
+    "What is the recommended tire pressure?",
+    "How often should I change the engine oil?",
+    "How do I engage 4LO?",
+    "What does the brake warning light mean?",
+    "How do I jump start the battery?",
+]
+
+
+def make_manuals(directory, documents=4, pages_per_document=6):
+    """Generate `documents` PDF manuals covering MANUAL_TOPICS."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    topics = list(MANUAL_TOPICS.items())
+    for d in range(documents):
+        pages = []
+        for p in range(pages_per_document):
+            title, body = topics[(d * pages_per_document + p) % len(topics)]
+            sentences = [f"{title} - section {d}.{p}"] + [body] * 8
+            pages.append("\n".join(sentences))
+        make_pdf(directory / f"manual_{d}.pdf", pages)
+    return directory
+
+
+# Swapping the stand-ins in
+
+@contextmanager
+def offline(chat_model=None, embeddings=None, image_client=None):
+    """Route every model, embeddings and image client the agents create to the fakes.
+
+    Covers both the shared registry (MultiAgent) and agents that call
+    `init_chat_model` / `OpenAIEmbeddings` / `OpenAI()` themselves.
+    """
+    import sql_agent
+    import rag_agent
+    import image_agent
+    from registry import registry
+
+    chat_model = chat_model or ScriptedChatModel()
+    embeddings = embeddings or HashingEmbeddings()
+    image_client = image_client or FakeImageClient()
+
+    patches = [
+        mock.patch.object(registry, "chat_model", lambda *args, **kwargs: chat_model),
+        mock.patch.object(registry, "embeddings", lambda *args, **kwargs: embeddings),
+        mock.patch.object(registry, "openai_client", lambda *args, **kwargs: image_client),
+        mock.patch.object(sql_agent, "init_chat_model", lambda *args, **kwargs: chat_model),
+        mock.patch.object(rag_agent, "init_chat_model", lambda *args, **kwargs: chat_model),
+        mock.patch.object(rag_agent, "OpenAIEmbeddings", lambda *args, **kwargs: embeddings),
+        mock.patch.object(image_agent, "init_chat_model", lambda *args, **kwargs: chat_model),
+        mock.patch("openai.OpenAI", lambda *args, **kwargs: image_client),
+    ]
+    for p in patches:
+        p.start()
+    try:
+        yield SimpleNamespace(chat_model=chat_model, embeddings=embeddings, image_client=image_client)
+    finally:
+        for p in reversed(patches):
+            p.stop()
@@ -0,0 +1,288 @@
+"""Offline benchmark suite for the agents.
+
+Runs fixed scenarios against deterministic fakes (see fakes.py), so no API
+key is needed and results are comparable between commits:
+
+    sql          SQLAgent answering fixed questions on Chinook.db
+    rag          RagAgent answering questions over generated PDF manuals
+    cover        ImageAgent generating album covers
+    multi_agent  MultiAgent.run for a few artists, up to the email approval
+
+Usage:
+    python run_benchmarks.py --output baseline.json
+    python run_benchmarks.py --compare baseline.json            # after a change
+    python run_benchmarks.py --scenarios sql rag --iterations 20 --llm-latency 0.05
+    python run_benchmarks.py --llm-cache /tmp/bench_cache.db      # run twice to see warm-cache numbers
+"""
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+
+from fakes import (
+    ROOT, SQL_QUESTIONS, RAG_QUESTIONS, ScriptedChatModel, HashingEmbeddings,
+    FakeImageClient, make_manuals, offline,
+)
+from instrumentation import MetricsRecorder, MetricsCallbackHandler
+from llm_cache import SQLiteResponseCache
+
+DB_URI = f"sqlite:///{ROOT / 'clase_1' / 'Chinook.db'}"
+COVER_REQUESTS = [
+    ("AC/DC", "Back in Black", "original"),
+    ("Iron Maiden", "Powerslave", "alternative"),
+    ("Led Zeppelin", "IV", "alternative"),
+]
+MULTI_AGENT_ARTISTS = ["AC/DC", "Aerosmith", "Audioslave"]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Scenario:
+    """A benchmark scenario: `setup()` once, then `run(i)` for each iteration.
+
+    Every `run(i)` starts from an empty chat history, so an operation costs
+    the same whatever the number of iterations.
+    """
+
+    name = None
+
+    def __init__(self, workdir, callbacks):
+        self.workdir = workdir
+        self.callbacks = callbacks
+
+    def setup(self):
+        pass
+
+    def run(self, i):
+        raise NotImplementedError
+
+
+class SQLScenario(Scenario):
+    name = "sql"
+
+    def setup(self):
+        from sql_agent import SQLAgent
+        self.agent = SQLAgent(
+            db_uri=DB_URI, model_name="fake", history_path=self.workdir / "sql_history.json",
+            callbacks=self.callbacks, verbose=False,
+        )
+        self.questions = list(SQL_QUESTIONS)
+
+    def run(self, i):
+        self.agent.query(self.questions[i % len(self.questions)], memory=InMemoryChatMessageHistory())
+
+
+class RAGScenario(Scenario):
+    name = "rag"
+
+    def setup(self):
+        from rag_agent import RagAgent
+        directory = make_manuals(self.workdir / "manuals")
+        self.agent = RagAgent(model_name="fake", directory=str(directory), callbacks=self.callbacks, verbose=False)
+
+    def run(self, i):
+        self.agent.query(RAG_QUESTIONS[i % len(RAG_QUESTIONS)], memory=InMemoryChatMessageHistory())
+
+
+class CoverScenario(Scenario):
+    name = "cover"
+
+    def setup(self):
+        from image_agent import ImageAgent
+        self.agent = ImageAgent(
+            model_name="fake", output_dir=self.workdir / "covers", callbacks=self.callbacks, verbose=False,
+        )
+        self.agent.output_dir.mkdir(exist_ok=True)
+
+    def run(self, i):
+        artist, album, style = COVER_REQUESTS[i % len(COVER_REQUESTS)]
+        self.agent.generate_cover(artist, album, style, memory=InMemoryChatMessageHistory())
+
+
+class MultiAgentScenario(Scenario):
+    name = "multi_agent"
+
+    def setup(self):
+        from multi_agent import MultiAgent
+        self.agent = MultiAgent(
+            db_uri=DB_URI, model_name="fake", output_dir=self.workdir / "album_covers",
+            checkpoint_path=":memory:", callbacks=self.callbacks, quiet=True,
+        )
+
+    def run(self, i):
+        self.agent.run(MULTI_AGENT_ARTISTS[i % len(MULTI_AGENT_ARTISTS)], "qa@example.com")
+
+
+SCENARIOS = {s.name: s for s in (SQLScenario, RAGScenario, CoverScenario, MultiAgentScenario)}
+
+
+def run_scenario(scenario_cls, iterations, warmup):
+    recorder = MetricsRecorder(max_events=None)
+    with tempfile.TemporaryDirectory() as tmp:
+        scenario = scenario_cls(Path(tmp), [MetricsCallbackHandler(recorder, agent=scenario_cls.name)])
+
+        start = time.perf_counter()
+        scenario.setup()
+        setup_s = time.perf_counter() - start
+
+        for i in range(warmup):
+            scenario.run(i)
+        recorder.reset()
+
+        latencies = []
+        start = time.perf_counter()
+        for i in range(iterations):
+            op_start = time.perf_counter()
+            scenario.run(i)
+            latencies.append(time.perf_counter() - op_start)
+        elapsed = time.perf_counter() - start
+        events = list(recorder.events)
+
+        # One extra traced iteration for allocations, so tracing doesn't skew the timings
+        tracemalloc.start()
+        scenario.run(iterations)
+        _, peak_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    def count(kind):
+        return sum(1 for e in events if e["kind"] == kind)
+
+    return {
+        "iterations": iterations,
+        "setup_s": setup_s,
+        "throughput_ops": iterations / elapsed if elapsed else 0.0,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        "latency_p99_s": percentile(latencies, 99),
+        "latency_mean_s": statistics.mean(latencies),
+        "peak_alloc_kb": peak_alloc / 1024,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "llm_calls_per_op": count("llm") / iterations,
+        "llm_cache_hits_per_op": sum(1 for e in events if e.get("cache_hit")) / iterations,
+        "tool_calls_per_op": count("tool") / iterations,
+        "prompt_tokens_per_op": sum(e.get("prompt_tokens") or 0 for e in events) / iterations,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparable(results, baseline):
+    """Return why `baseline` can't be compared with `results`, or None if it can."""
+    for key in ("iterations", "latencies"):
+        if baseline["meta"].get(key) != results["meta"][key]:
+            return f"baseline has {key}={baseline['meta'].get(key)}, this run has {results['meta'][key]}"
+    return None
+
+
+def compare(results, baseline, threshold):
+    """Print per-metric changes; return the metrics that regressed by more than `threshold` %."""
+    higher_is_better = {"throughput_ops"}
+    regressions = []
+    print(f"\nCompared to baseline ({baseline['meta'].get('commit')}):")
+    for name, metrics in results["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if not old:
+            continue
+        print(f"  {name}")
+        for key in ("throughput_ops", "latency_p50_s", "latency_p95_s", "latency_p99_s",
+                    "peak_alloc_kb", "llm_calls_per_op", "tool_calls_per_op", "prompt_tokens_per_op"):
+            if not old.get(key):
+                continue
+            change = (metrics[key] - old[key]) / old[key] * 100
+            worse = -change if key in higher_is_better else change
+            flag = "  <-- regression" if worse > threshold else ""
+            print(f"    {key:<22} {old[key]:>12.4g} -> {metrics[key]:<12.4g} ({change:+.1f}%){flag}")
+            if flag:
+                regressions.append(f"{name}.{key}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per generated token")
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="seconds per embeddings call")
+    parser.add_argument("--image-latency", type=float, default=0.0, help="seconds per generated image")
+    parser.add_argument("--llm-cache", type=Path, help="SQLite response cache for the fake chat model")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    llm_cache = SQLiteResponseCache(args.llm_cache, namespace="benchmark") if args.llm_cache else None
+    fakes = dict(
+        chat_model=ScriptedChatModel(latency=args.llm_latency, token_latency=args.token_latency, cache=llm_cache),
+        embeddings=HashingEmbeddings(latency=args.embedding_latency),
+        image_client=FakeImageClient(latency=args.image_latency),
+    )
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "iterations": args.iterations,
+            "latencies": {
+                "llm": args.llm_latency, "token": args.token_latency,
+                "embedding": args.embedding_latency, "image": args.image_latency,
+            },
+        },
+        "scenarios": {},
+    }
+
+    with offline(**fakes):
+        for name in args.scenarios:
+            metrics = run_scenario(SCENARIOS[name], args.iterations, args.warmup)
+            results["scenarios"][name] = metrics
+            print(f"{name:<12} {metrics['throughput_ops']:8.2f} ops/s  "
+                  f"p50={metrics['latency_p50_s'] * 1000:8.2f}ms  "
+                  f"p95={metrics['latency_p95_s'] * 1000:8.2f}ms  "
+                  f"p99={metrics['latency_p99_s'] * 1000:8.2f}ms  "
+                  f"peak={metrics['peak_alloc_kb']:8.0f}KB  "
+                  f"llm/op={metrics['llm_calls_per_op']:.1f}  tools/op={metrics['tool_calls_per_op']:.1f}")
+
+    if llm_cache:
+        results["llm_cache"] = llm_cache.stats()
+        for namespace, stats in results["llm_cache"].items():
+            print(f"LLM cache [{namespace}]: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['hit_rate']:.0%} hit rate")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nSaved to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        mismatch = comparable(results, baseline)
+        if mismatch:
+            print(f"\nCannot compare with {args.compare}: {mismatch}")
+            sys.exit(2)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:g}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Streaming benchmark: when does the user see the first words, and what does each step cost?
+
+Runs the SQL agent (three tool calls per question) on the fake chat model with
+a long chat history already in memory, and compares:
+
+    values   the previous delivery, stream_mode="values": every step hands back
+             the whole conversation, and text only appears once the answer is done
+    stream   SQLAgent.stream: stream_mode=["updates", "messages"], tokens as the
+             model writes them and only the new messages of each step
+
+Reported per history size: time to first visible text, time to the full answer,
+and messages handed to the caller per question, tokens aside (which grows with
+the history for `values` and stays flat for `stream`).
+
+Usage:
+    python streaming_benchmark.py
+    python streaming_benchmark.py --history 10 100 500 --token-latency 0.02 --json streaming.json
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+
+from fakes import ROOT, SQL_QUESTIONS, ScriptedChatModel, offline
+from agent_stream import history_messages
+
+DB_URI = f"sqlite:///{ROOT / 'clase_1' / 'Chinook.db'}"
+
+
+def make_history(size):
+    """`size` messages of earlier questions and answers, the kind that pile up in a session."""
+    history = InMemoryChatMessageHistory()
+    questions = list(SQL_QUESTIONS)
+    for i in range(size // 2):
+        history.add_user_message(questions[i % len(questions)])
+        history.add_ai_message(f"Here is what I found:\n[('row {i}', {i * 7})] " + "and some more detail " * 10)
+    return history
+
+
+def run_values(agent, question, history):
+    """The old delivery: the full message list after every step."""
+    memory = InMemoryChatMessageHistory(messages=list(history.messages))
+    memory.add_user_message(question)
+    start = time.perf_counter()
+    delivered = 0
+    answer = None
+    for step in agent.agent.stream({"messages": history_messages(memory)}, stream_mode="values"):
+        delivered += len(step["messages"])
+        last = step["messages"][-1]
+        if last.type == "ai" and last.content and not last.tool_calls:
+            answer = last.content
+    total = time.perf_counter() - start
+    return {"first_text_s": total, "answer_s": total, "delivered": delivered, "ok": bool(answer)}
+
+
+def run_stream(agent, question, history):
+    memory = InMemoryChatMessageHistory(messages=list(history.messages))
+    start = time.perf_counter()
+    first_text = None
+    delivered = 0
+    answer = None
+    for kind, data in agent.stream(question, memory=memory):
+        if kind == "token":
+            first_text = first_text or time.perf_counter() - start
+            continue
+        delivered += 1
+        if kind == "answer":
+            answer = data
+    total = time.perf_counter() - start
+    return {"first_text_s": first_text or total, "answer_s": total, "delivered": delivered, "ok": bool(answer)}
+
+
+def measure(run, agent, history, iterations):
+    questions = list(SQL_QUESTIONS)
+    results = [run(agent, questions[i % len(questions)], history) for i in range(iterations)]
+    return {
+        "first_text_p50_s": statistics.median(r["first_text_s"] for r in results),
+        "answer_p50_s": statistics.median(r["answer_s"] for r in results),
+        "delivered_per_question": statistics.mean(r["delivered"] for r in results),
+        "ok": all(r["ok"] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 100, 500], help="messages already in memory")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="seconds per generated token")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    args = parser.parse_args()
+
+    from sql_agent import SQLAgent
+
+    chat_model = ScriptedChatModel(latency=args.llm_latency, token_latency=args.token_latency)
+    results = []
+    print(f"{'history':>8} {'mode':>7} {'first text':>11} {'answer':>9} {'delivered/q':>12}")
+    with offline(chat_model=chat_model), tempfile.TemporaryDirectory() as tmp:
+        agent = SQLAgent(db_uri=DB_URI, model_name="fake", history_path=Path(tmp) / "history.json", verbose=False)
+        for size in args.history:
+            history = make_history(size)
+            for mode, run in (("values", run_values), ("stream", run_stream)):
+                metrics = measure(run, agent, history, args.iterations)
+                results.append({"history": size, "mode": mode, **metrics})
+                print(f"{size:>8} {mode:>7} {metrics['first_text_p50_s'] * 1000:>9.0f}ms "
+                      f"{metrics['answer_p50_s'] * 1000:>7.0f}ms {metrics['delivered_per_question']:>12.0f}")
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "latencies": {"llm": args.llm_latency, "token": args.token_latency},
+            "results": results,
+        }, indent=2))
+        print(f"\nSaved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import sqlite3
+from difflib import SequenceMatcher
+from urllib.parse import unquote, urlparse
+
+
+class AmbiguousArtistError(LookupError):
+  """Raised when an artist name matches more than one artist in the database."""
+
+  def __init__(self, name, candidates):
+    self.name = name
+    self.candidates = candidates
+    super().__init__(f"'{name}' matches several artists: {', '.join(candidates)}")
+
+
+class ChinookRepository:
+  """Typed, read-only data access over the Chinook database.
+
+  Runs parameterized SQL directly, so lookups answer in milliseconds
+  instead of going through the SQL agent's ReAct loop.
+  """
+
+  def __init__(self, db_uri, fuzzy_cutoff=0.75, fuzzy_margin=0.05):
+    self.db_path = self._path_from_uri(db_uri)
+    self.fuzzy_cutoff = fuzzy_cutoff
+    self.fuzzy_margin = fuzzy_margin
+    self._connection = None
+    self._artist_names = None
+
+  @staticmethod
+  def _path_from_uri(db_uri):
+    # Accepts SQLAlchemy style "sqlite:///Chinook.db" as well as plain paths
+    if "://" not in db_uri:
+      return db_uri
+    parsed = urlparse(db_uri)
+    if not parsed.scheme.startswith("sqlite"):
+      raise ValueError(f"ChinookRepository only supports sqlite URIs, got: {db_uri}")
+    return unquote(db_uri.split(":///", 1)[1])
+
+  @property
+  def connection(self):
+    if self._connection is None:
+      self._connection = sqlite3.connect(
+        f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+      )
+    return self._connection
+
+  def close(self):
+    if self._connection is not None:
+      self._connection.close()
+      self._connection = None
+
+  def artist_names(self) -> list[str]:
+    """All artist names, loaded once and kept for fuzzy matching."""
+    if self._artist_names is None:
+      rows = self.connection.execute(
+        "SELECT Name FROM Artist WHERE Name IS NOT NULL ORDER BY Name"
+      ).fetchall()
+      self._artist_names = [row[0] for row in rows]
+    return self._artist_names
+
+  def find_artists(self, name: str) -> list[str]:
+    """Return the artist names that best match `name`.
+
+    An exact (case-insensitive) match wins outright; otherwise substring
+    matches are returned, and as a last resort close spellings. A close
+    spelling that clearly beats the runner-up is returned on its own.
+    """
+    wanted = name.strip().casefold()
+    if not wanted:
+      return []
+    names = self.artist_names()
+
+    exact = [n for n in names if n.casefold() == wanted]
+    if exact:
+      return exact
+
+    partial = [n for n in names if wanted in n.casefold()]
+    if partial:
+      return partial
+
+    scored = sorted(
+      ((SequenceMatcher(None, wanted, n.casefold()).ratio(), n) for n in names),
+      reverse=True,
+    )
+    close = [(score, n) for score, n in scored[:3] if score >= self.fuzzy_cutoff]
+    if len(close) > 1 and close[0][0] - close[1][0] >= self.fuzzy_margin:
+      close = close[:1]
+    return [n for _, n in close]
+
+  def resolve_artist(self, name: str):
+    """Resolve `name` to a single artist name.
+
+    Returns:
+      str | None: The artist name, or None if nothing matches
+
+    Raises:
+      AmbiguousArtistError: If several artists match equally well
+    """
+    candidates = self.find_artists(name)
+    if not candidates:
+      return None
+    if len(candidates) > 1:
+      raise AmbiguousArtistError(name, candidates)
+    return candidates[0]
+
+  def albums_by_artist(self, name: str) -> list[str]:
+    """Return the album titles for the artist matching `name`.
+
+    Raises:
+      AmbiguousArtistError: If the name matches several artists
+    """
+    artist = self.resolve_artist(name)
+    if artist is None:
+      return []
+    rows = self.connection.execute(
+      """
+      SELECT Album.Title
+      FROM Album
+      JOIN Artist ON Artist.ArtistId = Album.ArtistId
+      WHERE Artist.Name = ?
+      ORDER BY Album.Title
+      """,
+      (artist,),
+    ).fetchall()
+    return [row[0] for row in rows]
@@ -4,30 +4,42 @@ from langchain_community.agent_toolkits import SQLDatabaseToolkit
 from langchain.agents import create_agent
 from langchain_community.chat_message_histories import FileChatMessageHistory
 from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent / "shared"))
+from agent_stream import stream_turn
 
 class SQLAgent:
 
-  def __init__(self, db_uri, model_name, top_k=5, history_path=None):
+  def __init__(self, db_uri, model_name, top_k=5, history_path=None, model=None, callbacks=None, verbose=True,
+               memory=None):
     self.db_uri     = db_uri
     self.model_name = model_name
     self.top_k      = top_k
+    self.callbacks  = callbacks or []
+    self.verbose    = verbose
 
-    self.model = None
+    self.model = model
     self.db = None
     self.toolkit = None
     self.tools = None
     self.agent = None
-    history_file = history_path or (Path(__file__).parent / "chat_history.json")
-    self.memory = FileChatMessageHistory(str(history_file))
+    if memory is None:
+      history_file = history_path or (Path(__file__).parent / "chat_history.json")
+      memory = FileChatMessageHistory(str(history_file))
+    self.memory = memory
     self._setup()
 
   def _setup(self):
-    self.model = init_chat_model(self.model_name)
+    if self.model is None:
+      self.model = init_chat_model(self.model_name)
     self.db = SQLDatabase.from_uri(self.db_uri)
     self.toolkit = SQLDatabaseToolkit(db=self.db, llm=self.model)
     self.tools = self.toolkit.get_tools()
     system_prompt = self._get_system_prompt()
-    self.agent = create_agent(self.model, self.tools, system_prompt=system_prompt)
+    # No checkpointing: when called from a checkpointed graph (MultiAgent) the agent
+    # would otherwise inherit its checkpointer and persist every inner step
+    self.agent = create_agent(self.model, self.tools, system_prompt=system_prompt, checkpointer=False)
 
   def _get_system_prompt(self):
     return f"""
@@ -52,36 +64,20 @@ can query. Do NOT skip this step.
 
 Then you should query the schema of the most relevant tables.
 """
-  def query(self, question):
-    self.memory.add_user_message(question)
-    input_messages = self._prepare_messages()
-    last_messages = self._stream_agent_response(input_messages)
-    self._save_assistant_response(last_messages)
-
-  def _save_assistant_response(self, messages):
-    for msg in reversed(messages):
-      if msg.type == 'ai':
-        content = msg.content if isinstance(msg.content, str) else str(msg.content)
-        self.memory.add_ai_message(content)
-
-  def _stream_agent_response(self, input_messages):
-    last_messages = None
-    for step in self.agent.stream({"messages": input_messages}, stream_mode="values"):
-      step["messages"][-1].pretty_print()
-      last_messages = step["messages"]
-    return last_messages
+  def query(self, question, memory=None, callbacks=None):
+    """Answer `question` and return the final answer text.
 
-  def _prepare_messages(self):
-    role_map = {
-      "human": "user",
-      "ai": "assistant",
-      "system": "system",
-      "tool": "tool"
-    }
-    # { role: user, content: "cuantas facturas hay?" }
-    # { role: ai, content: "hay 150 facturas"}
-    return [
-      { "role": role_map.get(m.type, "user"), "content": m.content or "" }
-      for m in self.memory.messages
-    ]
+    `memory` overrides the agent's own history (e.g. one per server session)
+    and `callbacks` are added to the agent's callbacks for this call only.
+    """
+    answer = None
+    for kind, data in self.stream(question, memory, callbacks):
+      if kind == "answer":
+        answer = data
+    return answer
 
+  def stream(self, question, memory=None, callbacks=None):
+    """Answer `question`, yielding the (kind, data) events of agent_stream as they happen."""
+    memory = self.memory if memory is None else memory
+    config = {"callbacks": self.callbacks + list(callbacks or [])}
+    return stream_turn(self.agent, memory, question, config, self.verbose)
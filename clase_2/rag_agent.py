@@ -7,12 +7,20 @@ from langchain_community.document_loaders import DirectoryLoader
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.tools import tool
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent / "shared"))
+from agent_stream import stream_turn
+
 # Retrieval-Augmented Generation
 class RagAgent:
-  def __init__(self, model_name, directory):
-    self.model = init_chat_model(model_name)
+  def __init__(self, model_name, directory, model=None, embeddings=None, callbacks=None, verbose=True):
+    self.model = model or init_chat_model(model_name)
+    self.callbacks = callbacks or []
+    self.verbose = verbose
     self.directory = directory
-    self.embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
+    self.embeddings = embeddings or OpenAIEmbeddings(model="text-embedding-3-large")
     self.vector_store = InMemoryVectorStore(self.embeddings)
     self.memory = InMemoryChatMessageHistory()
 
@@ -64,35 +72,20 @@ IMPORTANT RULES:
 2. ALWAYS use the retrieve_context tool to search for relevant information in the documents before answering any question.
 """
 
-  def query(self, question):
-    self.memory.add_user_message(question)
-    input_messages = self._prepare_messages()
-    last_messages = self._stream_agent_response(input_messages)
-    self._save_assistant_response(last_messages)
-
-  def _save_assistant_response(self, messages):
-    if not messages:
-      return
-    for msg in reversed(messages):
-      if msg.type == "ai":
-        content = msg.content if isinstance(msg.content, str) else str(msg.content)
-        self.memory.add_ai_message(content)
+  def query(self, question, memory=None, callbacks=None):
+    """Answer `question` and return the final answer text.
 
-  def _stream_agent_response(self, input_messages):
-    last_messages = None
-    for step in self.agent.stream({"messages": input_messages}, stream_mode="values"):
-      step["messages"][-1].pretty_print()
-      last_messages = step["messages"]
-    return last_messages
+    `memory` overrides the agent's own history (e.g. one per server session)
+    and `callbacks` are added to the agent's callbacks for this call only.
+    """
+    answer = None
+    for kind, data in self.stream(question, memory, callbacks):
+      if kind == "answer":
+        answer = data
+    return answer
 
-  def _prepare_messages(self):
-    role_map = {
-      "human": "user",
-      "ai": "assistant",
-      "system": "system",
-      "tool": "tool"
-    }
-    return [
-      {"role": role_map.get(m.type, "user"), "content": m.content or ""}
-      for m in self.memory.messages
-    ]
+  def stream(self, question, memory=None, callbacks=None):
+    """Answer `question`, yielding the (kind, data) events of agent_stream as they happen."""
+    memory = self.memory if memory is None else memory
+    config = {"callbacks": self.callbacks + list(callbacks or [])}
+    return stream_turn(self.agent, memory, question, config, self.verbose)
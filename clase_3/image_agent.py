@@ -2,17 +2,30 @@ from langchain.chat_models import init_chat_model
 from langchain.agents import create_agent
 from langchain_core.chat_history import InMemoryChatMessageHistory
 from langchain.tools import tool
-import requests
 import base64
 import os
+import re
+import sys
+import uuid
 from pathlib import Path
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).parent.parent / "shared"))
+from agent_stream import stream_turn
+
+_SAVED_TO = re.compile(r'Album cover saved successfully to: (.+?)(?:\n|$)')
+
 class ImageAgent:
-  def __init__(self, model_name, image_model="dall-e-3", output_dir=None):
-    self.model = init_chat_model(model_name)
+  def __init__(self, model_name, image_model="dall-e-3", output_dir=None, model=None, image_client=None,
+               callbacks=None, verbose=True, unique_names=False):
+    self.model = model or init_chat_model(model_name)
+    self.callbacks = callbacks or []
+    self.verbose = verbose
     self.image_model = image_model
+    self._image_client = image_client
     self.output_dir = Path(output_dir) if output_dir else Path.cwd()
+    # Add a random suffix to file names, for when many users share output_dir
+    self.unique_names = unique_names
     self.memory = InMemoryChatMessageHistory()
 
     @tool
@@ -47,10 +60,7 @@ Do NOT recreate any existing album cover - create an original new design."""
 
       try:
         # Use OpenAI's DALL-E for image generation
-        from openai import OpenAI
-        client = OpenAI()
-
-        image_response = client.images.generate(
+        image_response = self.image_client.images.generate(
           model=self.image_model,
           prompt=prompt,
           size="auto",
@@ -65,7 +75,8 @@ Do NOT recreate any existing album cover - create an original new design."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_artist = "".join(c for c in artist if c.isalnum() or c in (' ', '-', '_')).strip()
         safe_album = "".join(c for c in album if c.isalnum() or c in (' ', '-', '_')).strip()
-        filename = f"{safe_artist}_{safe_album}_{style}_{timestamp}.png"
+        suffix = f"_{uuid.uuid4().hex[:8]}" if self.unique_names else ""
+        filename = f"{safe_artist}_{safe_album}_{style}_{timestamp}{suffix}.png"
         filepath = self.output_dir / filename
 
         # Download and save the image
@@ -79,7 +90,17 @@ Do NOT recreate any existing album cover - create an original new design."""
 
     tools = [generate_album_cover]
     system_prompt = self._get_system_prompt()
-    self.agent = create_agent(self.model, tools, system_prompt=system_prompt)
+    # No checkpointing: when called from a checkpointed graph (MultiAgent) the agent
+    # would otherwise inherit its checkpointer and persist every inner step
+    self.agent = create_agent(self.model, tools, system_prompt=system_prompt, checkpointer=False)
+
+  @property
+  def image_client(self):
+    # Created on first use and reused, instead of a new client per image
+    if self._image_client is None:
+      from openai import OpenAI
+      self._image_client = OpenAI()
+    return self._image_client
 
   def _get_system_prompt(self):
     return """
@@ -96,29 +117,28 @@ IMPORTANT RULES:
 3. Report back to the user where the image was saved
 """
 
-  def generate_cover(self, artist, album, style="alternative"):
+  def generate_cover(self, artist, album, style="alternative", memory=None, callbacks=None):
     """Generate one album cover with the specified style
 
+    Args:
+        memory: History to use instead of the agent's own (e.g. per server session)
+        callbacks: Extra callback handlers for this call only
+
     Returns:
         str: Path to the generated image file
     """
-    question = f"Generate a {style} album cover for the album '{album}' by {artist}"
-    self.memory.add_user_message(question)
-    input_messages = self._prepare_messages()
-    last_messages = self._stream_agent_response(input_messages)
-    self._save_assistant_response(last_messages)
-
-    # Extract file path from the response
-    if last_messages:
-      for msg in reversed(last_messages):
-        if msg.type == "ai" and msg.content:
-          content = msg.content if isinstance(msg.content, str) else str(msg.content)
-          # Look for the file path in the response
-          if "Album cover saved successfully to:" in content:
-            import re
-            match = re.search(r'Album cover saved successfully to: (.+?)(?:\n|$)', content)
-            if match:
-              return match.group(1).strip()
+    # Extract file path from the answer, or failing that from the tool's own output
+    tool_path = None
+    for kind, data in self.stream_cover(artist, album, style, memory, callbacks):
+      if kind == "tool_result":
+        match = _SAVED_TO.search(str(data["content"]))
+        tool_path = match.group(1).strip() if match else tool_path
+      elif kind == "answer" and data:
+        match = _SAVED_TO.search(data)
+        if match:
+          return match.group(1).strip()
+    if tool_path:
+      return tool_path
 
     # If we can't extract the path, construct it based on the pattern
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -127,29 +147,12 @@ IMPORTANT RULES:
     filename = f"{safe_artist}_{safe_album}_{style}_{timestamp}.png"
     return str(self.output_dir / filename)
 
-  def _save_assistant_response(self, messages):
-    if not messages:
-      return
-    for msg in reversed(messages):
-      if msg.type == "ai":
-        content = msg.content if isinstance(msg.content, str) else str(msg.content)
-        self.memory.add_ai_message(content)
-
-  def _stream_agent_response(self, input_messages):
-    last_messages = None
-    for step in self.agent.stream({"messages": input_messages}, stream_mode="values"):
-      step["messages"][-1].pretty_print()
-      last_messages = step["messages"]
-    return last_messages
-
-  def _prepare_messages(self):
-    role_map = {
-      "human": "user",
-      "ai": "assistant",
-      "system": "system",
-      "tool": "tool"
-    }
-    return [
-      {"role": role_map.get(m.type, "user"), "content": m.content or ""}
-      for m in self.memory.messages
-    ]
+  def stream_cover(self, artist, album, style="alternative", memory=None, callbacks=None):
+    """Generate one album cover, yielding events as they happen.
+
+    Yields the same (kind, data) events as SQLAgent.stream (see agent_stream).
+    """
+    question = f"Generate a {style} album cover for the album '{album}' by {artist}"
+    memory = self.memory if memory is None else memory
+    config = {"callbacks": self.callbacks + list(callbacks or [])}
+    return stream_turn(self.agent, memory, question, config, self.verbose)
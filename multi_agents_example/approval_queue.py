@@ -0,0 +1,85 @@
+import json
+import sqlite3
+from datetime import datetime
+
+
+class ApprovalQueue:
+    """Persistent queue of workflow runs waiting for a human decision.
+
+    Each entry is keyed by the LangGraph thread id of the paused run, so a
+    reviewer can list pending approvals and resume any of them later, from
+    any process.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS approvals (
+                thread_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                created_at TEXT NOT NULL,
+                decided_at TEXT
+            )
+            """
+        )
+        self.conn.commit()
+
+    def add(self, thread_id: str, payload: dict):
+        """Register a paused run as waiting for approval."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO approvals (thread_id, payload, status, created_at) "
+            "VALUES (?, ?, 'pending', ?)",
+            (thread_id, json.dumps(payload, default=str), datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    def pending(self) -> list[dict]:
+        """Return the runs still waiting for a decision, oldest first."""
+        rows = self.conn.execute(
+            "SELECT thread_id, payload, created_at FROM approvals "
+            "WHERE status = 'pending' ORDER BY created_at"
+        ).fetchall()
+        return [
+            {"thread_id": thread_id, "created_at": created_at, **json.loads(payload)}
+            for thread_id, payload, created_at in rows
+        ]
+
+    def get(self, thread_id: str):
+        row = self.conn.execute(
+            "SELECT payload, status FROM approvals WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        payload, status = row
+        return {"thread_id": thread_id, "status": status, **json.loads(payload)}
+
+    def claim(self, thread_id: str) -> bool:
+        """Atomically take a pending run for deciding; False if it is not pending (anymore).
+
+        Only one reviewer, in any process, can claim a given run.
+        """
+        cursor = self.conn.execute(
+            "UPDATE approvals SET status = 'deciding' WHERE thread_id = ? AND status = 'pending'",
+            (thread_id,),
+        )
+        self.conn.commit()
+        return cursor.rowcount == 1
+
+    def release(self, thread_id: str):
+        """Put a claimed run back in the queue, e.g. when resuming it failed."""
+        self.conn.execute(
+            "UPDATE approvals SET status = 'pending' WHERE thread_id = ? AND status = 'deciding'",
+            (thread_id,),
+        )
+        self.conn.commit()
+
+    def resolve(self, thread_id: str, approved: bool):
+        """Mark a run as approved or rejected."""
+        self.conn.execute(
+            "UPDATE approvals SET status = ?, decided_at = ? WHERE thread_id = ?",
+            ("approved" if approved else "rejected", datetime.now().isoformat(), thread_id),
+        )
+        self.conn.commit()
@@ -0,0 +1,65 @@
+"""Review the album cover emails waiting for approval.
+
+Usage:
+    python approvals.py list
+    python approvals.py show <run_id>
+    python approvals.py approve <run_id>
+    python approvals.py reject <run_id>
+"""
+import argparse
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from multi_agent import MultiAgent
+
+load_dotenv()
+
+
+def print_preview(entry):
+    preview = entry["preview"]
+    print(f"Run: {entry['thread_id']}")
+    print(f"Artist: {entry['artist_name']}")
+    print(f"Images: {len(entry['images'])}")
+    print(f"From: {preview['from']}")
+    print(f"To: {preview['to']}")
+    print(f"Subject: {preview['subject']}")
+    print(f"\nBody:\n{preview['body']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["list", "show", "approve", "reject"])
+    parser.add_argument("run_id", nargs="?")
+    args = parser.parse_args()
+
+    if args.action != "list" and not args.run_id:
+        parser.error(f"'{args.action}' needs a run id")
+
+    db_path = Path(__file__).parent.parent / "clase_1" / "Chinook.db"
+    multi_agent = MultiAgent(
+        db_uri=f"sqlite:///{db_path}",
+        model_name=os.getenv("MODEL_NAME", "gpt-4o-mini"),
+        image_model=os.getenv("IMAGE_MODEL", "dall-e-3"),
+    )
+
+    if args.action == "list":
+        pending = multi_agent.pending_approvals()
+        if not pending:
+            print("No emails waiting for approval.")
+        for entry in pending:
+            print(f"{entry['thread_id']}  {entry['created_at']}  {entry['artist_name']} "
+                  f"({len(entry['images'])} covers) -> {entry['preview']['to']}")
+    elif args.action == "show":
+        entry = multi_agent.approvals.get(args.run_id)
+        if entry is None:
+            print(f"❌ Unknown run: {args.run_id}")
+            return
+        print_preview(entry)
+    else:
+        multi_agent.decide(args.run_id, approved=args.action == "approve")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare album lookup latency: direct repository vs. SQL agent.
+
+Usage:
+    python benchmark_album_lookup.py           # repository path only
+    python benchmark_album_lookup.py --llm     # also time the SQL agent (needs OPENAI_API_KEY)
+    python benchmark_album_lookup.py --llm --limit 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "clase_1"))
+
+from chinook_repository import ChinookRepository, AmbiguousArtistError
+
+
+def summarize(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<12} n={len(timings):<4} "
+          f"mean={statistics.mean(timings) * 1000:9.2f}ms "
+          f"p50={statistics.median(timings) * 1000:9.2f}ms "
+          f"p95={p95 * 1000:9.2f}ms "
+          f"total={sum(timings):8.2f}s")
+
+
+def time_repository(repository, artists):
+    timings = []
+    ambiguous = 0
+    for artist in artists:
+        start = time.perf_counter()
+        try:
+            repository.albums_by_artist(artist)
+        except AmbiguousArtistError:
+            ambiguous += 1
+        timings.append(time.perf_counter() - start)
+    return timings, ambiguous
+
+
+def time_agent(db_uri, model_name, artists):
+    from langchain_core.chat_history import InMemoryChatMessageHistory
+    from multi_agent import MultiAgent
+
+    # Throwaway history, covers and checkpoints, and a fresh history for every lookup, so
+    # the tracked files stay untouched and each prompt holds a single question
+    with tempfile.TemporaryDirectory() as tmp:
+        multi_agent = MultiAgent(
+            db_uri=db_uri, model_name=model_name, output_dir=Path(tmp) / "album_covers", checkpoint_path=":memory:",
+            sql_history_path=Path(tmp) / "sql_history.json", quiet=True,
+        )
+        timings = []
+        for artist in artists:
+            start = time.perf_counter()
+            multi_agent._get_albums_from_agent(artist, memory=InMemoryChatMessageHistory())
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm", action="store_true", help="also time the SQL agent path")
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N artists")
+    args = parser.parse_args()
+
+    db_path = Path(__file__).parent.parent / "clase_1" / "Chinook.db"
+    db_uri = f"sqlite:///{db_path}"
+    repository = ChinookRepository(db_uri)
+    artists = repository.artist_names()[:args.limit]
+
+    timings, ambiguous = time_repository(repository, artists)
+    summarize("repository", timings)
+    print(f"{'':<12} ambiguous names that would fall back to the agent: {ambiguous}")
+
+    if args.llm:
+        from dotenv import load_dotenv
+        load_dotenv()
+        model_name = os.getenv("MODEL_NAME", "gpt-4o-mini")
+        summarize("sql agent", time_agent(db_uri, model_name, artists))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure MultiAgent cold start: import time per module and construction time.
+
+Each measurement runs in a fresh interpreter so nothing is cached between runs.
+
+Usage:
+    python benchmark_startup.py                       # print report
+    python benchmark_startup.py --top 20              # show the 20 slowest imports
+    python benchmark_startup.py --json startup.json   # also save the results
+    python benchmark_startup.py --baseline startup.json   # compare against a saved run
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).parent
+
+STARTUP_SNIPPET = """
+import json, resource, time
+start = time.perf_counter()
+from multi_agent import MultiAgent
+imported = time.perf_counter()
+MultiAgent(db_uri={db_uri!r}, model_name="gpt-4o-mini", checkpoint_path=":memory:")
+built = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start,
+    "construct_s": built - imported,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+
+def import_times(module="multi_agent"):
+    """Run `python -X importtime -c 'import <module>'` and parse its report.
+
+    Returns:
+        list[tuple[str, int, int]]: (module, self_us, cumulative_us) per import
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def startup(repeat):
+    db_uri = f"sqlite:///{HERE.parent / 'clase_1' / 'Chinook.db'}"
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", STARTUP_SNIPPET.format(db_uri=db_uri)],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import_s", "construct_s", "max_rss_kb")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to show")
+    parser.add_argument("--repeat", type=int, default=5, help="startup runs (median is reported)")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare against a previous --json file")
+    args = parser.parse_args()
+
+    rows = import_times()
+    total_us = rows[-1][2] if rows else 0
+    print(f"Slowest imports (cumulative, of {total_us / 1000:.1f}ms total for multi_agent):")
+    for name, _, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f}ms  {name.strip()}")
+
+    results = {"import_total_ms": total_us / 1000, **startup(args.repeat)}
+    print(f"\nStartup (median of {args.repeat} fresh interpreters):")
+    print(f"  import      {results['import_s'] * 1000:9.1f}ms")
+    print(f"  construct   {results['construct_s'] * 1000:9.1f}ms")
+    print(f"  max RSS     {results['max_rss_kb'] / 1024:9.1f}MB")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        print(f"\nCompared to {args.baseline}:")
+        for key, value in results.items():
+            if key in baseline and baseline[key]:
+                change = (value - baseline[key]) / baseline[key] * 100
+                print(f"  {key:<16} {baseline[key]:>12.4g} -> {value:<12.4g} ({change:+.1f}%)")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+        print(f"\nSaved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
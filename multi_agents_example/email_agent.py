@@ -21,6 +21,7 @@ class EmailAgent:
     msg = self.prepare_email(to_email, body)
     with smtplib.SMTP(host=self.smtp_server, port=self.smtp_port) as server:
       server.send_message(msg)
+    return True
 
   def preview_email(self, to_email: str, body: str) -> dict:
     """Preview email details before sending.
@@ -1,4 +1,6 @@
 from multi_agent import MultiAgent
+from instrumentation import MetricsRecorder, MetricsCallbackHandler
+from llm_cache import SQLiteResponseCache
 from pathlib import Path
 from dotenv import load_dotenv
 import os
@@ -17,13 +19,34 @@ def main():
     output_dir = Path(__file__).parent / "album_covers"
     output_dir.mkdir(exist_ok=True)
 
+    # Optional instrumentation: per-call metrics to a JSONL file and/or a
+    # Prometheus endpoint at http://127.0.0.1:<METRICS_PORT>/metrics
+    callbacks = []
+    recorder = None
+    if os.getenv("METRICS_JSONL") or os.getenv("METRICS_PORT"):
+        recorder = MetricsRecorder(jsonl_path=os.getenv("METRICS_JSONL"))
+        if os.getenv("METRICS_PORT"):
+            recorder.serve_prometheus(port=int(os.getenv("METRICS_PORT")))
+        callbacks.append(MetricsCallbackHandler(recorder))
+
+    # Optional response cache shared by the agents, e.g. LLM_CACHE_PATH=llm_cache.db
+    llm_cache = None
+    if os.getenv("LLM_CACHE_PATH"):
+        llm_cache = SQLiteResponseCache(
+            os.getenv("LLM_CACHE_PATH"),
+            ttl=int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+        )
+
     # Initialize multi-agent system
     print("Initializing Multi-Agent System...")
     multi_agent = MultiAgent(
         db_uri=db_uri,
         model_name=model_name,
         image_model=image_model,
-        output_dir=output_dir
+        output_dir=output_dir,
+        callbacks=callbacks,
+        llm_cache=llm_cache,
+        quiet=os.getenv("QUIET", "").lower() in ("1", "true", "yes")
     )
 
     # Get artist name from user
@@ -55,10 +78,22 @@ def main():
             print("\n⚠️  No albums found for this artist.")
             print("💡 Tip: Try artists like 'AC/DC', 'Iron Maiden', 'Led Zeppelin', or 'Deep Purple'")
 
+        if final_state.get("current_step") == "awaiting_approval":
+            print("\n📧 The email is waiting for approval. Review it with:")
+            print(f"  python approvals.py show {final_state['thread_id']}")
+            print(f"  python approvals.py approve {final_state['thread_id']}")
+
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if recorder:
+            recorder.close()
+        if llm_cache:
+            for agent, stats in llm_cache.stats().items():
+                print(f"LLM cache [{agent}]: {stats['hits']} hits, {stats['misses']} misses "
+                      f"({stats['hit_rate']:.0%} hit rate, {stats['llm_calls_saved']} LLM calls saved)")
 
 
 if __name__ == "__main__":
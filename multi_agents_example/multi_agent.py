@@ -1,17 +1,29 @@
+import re
+import sqlite3
 import sys
+import uuid
 from pathlib import Path
 from typing import TypedDict, Annotated
 import operator
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.types import Command, interrupt
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langchain_core.chat_history import InMemoryChatMessageHistory
 
 # Add parent directories to path to import agents
 sys.path.append(str(Path(__file__).parent.parent / "clase_1"))
 sys.path.append(str(Path(__file__).parent.parent / "clase_3"))
+sys.path.append(str(Path(__file__).parent.parent / "shared"))
 
-from sql_agent import SQLAgent
-from image_agent import ImageAgent
+from chinook_repository import ChinookRepository, AmbiguousArtistError
 from email_agent import EmailAgent
+from registry import registry
+from approval_queue import ApprovalQueue
+
+
+_LIST_MARKER = re.compile(r'^(?:[-*•►]\s*|\d+[\.\)]\s*)')
+# Prose the SQL agent wraps around the titles, e.g. "I found 3 albums by Queen."
+_PROSE_PREFIXES = ('i found', 'albums:', 'album titles')
 
 
 class AgentState(TypedDict):
@@ -28,33 +40,89 @@ class AgentState(TypedDict):
 class MultiAgent:
     """Multi-agent system that coordinates SQLAgent, ImageAgent, and EmailAgent."""
 
-    def __init__(self, db_uri, model_name, image_model="dall-e-3", output_dir=None):
-        self.sql_agent = SQLAgent(
-            db_uri=db_uri,
-            model_name=model_name,
-            top_k=50,
-            history_path=Path(__file__).parent / "sql_history.json"
-        )
-        self.image_agent = ImageAgent(
-            model_name=model_name,
-            image_model=image_model,
-            output_dir=output_dir or Path(__file__).parent / "album_covers"
-        )
+    def __init__(self, db_uri, model_name, image_model="dall-e-3", output_dir=None, checkpoint_path=None,
+                 callbacks=None, quiet=False, llm_cache=None, sql_history_path=None):
+        self.db_uri = db_uri
+        self.model_name = model_name
+        self.image_model = image_model
+        self.output_dir = Path(output_dir or Path(__file__).parent / "album_covers")
+        self.repository = ChinookRepository(db_uri)
+        self.sql_history_path = sql_history_path or Path(__file__).parent / "sql_history.json"
+        # Callback handlers (e.g. instrumentation.MetricsCallbackHandler) passed to
+        # every graph run and agent; quiet turns off all console output
+        self.callbacks = callbacks or []
+        self.quiet = quiet
+        # Optional llm_cache.SQLiteResponseCache; each agent gets its own namespace
+        self.llm_cache = llm_cache
+
+        # SQLAgent and ImageAgent are built on first use (see the properties
+        # below); most runs never need the SQL agent at all
+        self._sql_agent = None
+        self._image_agent = None
 
         # Initialize EmailAgent (will raise error if env vars not set)
         try:
             self.email_agent = EmailAgent()
         except ValueError as e:
-            print(f"⚠️  Warning: {e}")
-            print("Email functionality will be disabled.")
+            self._log(f"⚠️  Warning: {e}")
+            self._log("Email functionality will be disabled.")
             self.email_agent = None
 
         # Ensure output directory exists
-        self.image_agent.output_dir.mkdir(exist_ok=True)
+        self.output_dir.mkdir(exist_ok=True)
+
+        # Runs paused for email approval are checkpointed here, so they can be
+        # resumed later (from any process) without keeping a worker blocked
+        checkpoint_path = checkpoint_path or Path(__file__).parent / "approvals.db"
+        self.checkpointer = SqliteSaver(sqlite3.connect(str(checkpoint_path), check_same_thread=False))
+        self.approvals = ApprovalQueue(checkpoint_path)
 
         # Build the workflow graph
         self.workflow = self._build_workflow()
-        self.app = self.workflow.compile()
+        self.app = self.workflow.compile(checkpointer=self.checkpointer)
+
+    @property
+    def sql_agent(self):
+        if self._sql_agent is None:
+            from sql_agent import SQLAgent
+            self._sql_agent = SQLAgent(
+                db_uri=self.db_uri,
+                model_name=self.model_name,
+                top_k=50,
+                history_path=self.sql_history_path,
+                model=self._chat_model("sql"),
+                callbacks=self.callbacks,
+                verbose=not self.quiet
+            )
+        return self._sql_agent
+
+    @property
+    def image_agent(self):
+        if self._image_agent is None:
+            from image_agent import ImageAgent
+            self._image_agent = ImageAgent(
+                model_name=self.model_name,
+                image_model=self.image_model,
+                output_dir=self.output_dir,
+                model=self._chat_model("image"),
+                image_client=registry.openai_client(),
+                callbacks=self.callbacks,
+                verbose=not self.quiet
+            )
+        return self._image_agent
+
+    def _chat_model(self, agent):
+        if self.llm_cache is None:
+            return registry.chat_model(self.model_name)
+        # The cache only replays deterministic calls, so cached agents sample at temperature 0
+        return registry.chat_model(self.model_name, temperature=0, cache=self.llm_cache.namespace(agent))
+
+    def _log(self, *args):
+        if not self.quiet:
+            print(*args)
+
+    def _config(self, thread_id):
+        return {"configurable": {"thread_id": thread_id}, "callbacks": self.callbacks}
 
     def _build_workflow(self):
         """Build the LangGraph workflow."""
@@ -79,58 +147,51 @@ class MultiAgent:
         return workflow
 
     def _get_albums_node(self, state: AgentState) -> AgentState:
-        """Node to get albums using SQLAgent."""
+        """Node to get albums, straight from the database when the artist is unambiguous."""
         artist_name = state["artist_name"]
-        print(f"\n{'='*60}")
-        print(f"Step 1: Querying database for albums by {artist_name}")
-        print(f"{'='*60}\n")
+        self._log(f"\n{'='*60}")
+        self._log(f"Step 1: Querying database for albums by {artist_name}")
+        self._log(f"{'='*60}\n")
 
-        # Query the SQL database for albums
-        question = f"Get all album titles by the artist '{artist_name}'. Return only the album titles, one per line."
-
-        # Capture the response
-        self.sql_agent.memory.add_user_message(question)
-        input_messages = self.sql_agent._prepare_messages()
+        try:
+            resolved = self.repository.resolve_artist(artist_name)
+            albums = self.repository.albums_by_artist(resolved) if resolved else []
+        except AmbiguousArtistError as e:
+            self._log(f"⚠️  {e}. Asking the SQL agent...")
+            resolved = None
+            albums = self._get_albums_from_agent(artist_name)
 
-        albums = []
-        last_messages = None
-        for step in self.sql_agent.agent.stream({"messages": input_messages}, stream_mode="values"):
-            step["messages"][-1].pretty_print()
-            last_messages = step["messages"]
-
-        # Save response to memory
-        self.sql_agent._save_assistant_response(last_messages)
-
-        # Extract album names from the last AI message
-        if last_messages:
-            for msg in reversed(last_messages):
-                if msg.type == 'ai' and msg.content:
-                    # Parse album names from response
-                    albums = self._parse_albums_from_response(msg.content)
-                    break
+        # Later steps (cover prompts, the email) use the name as it is in the database
+        if resolved and resolved != artist_name:
+            self._log(f"Using artist '{resolved}' for '{artist_name}'")
 
         return {
+            "artist_name": resolved or artist_name,
             "albums": albums,
             "current_step": "albums_retrieved",
             "messages": [f"Found {len(albums)} albums"]
         }
 
+    def _get_albums_from_agent(self, artist_name: str, memory=None) -> list[str]:
+        """Fallback: ask the SQL agent for the albums and parse its answer.
+
+        `memory` replaces the SQL agent's own history for this question.
+        """
+        question = f"Get all album titles by the artist '{artist_name}'. Return only the album titles, one per line."
+        answer = self.sql_agent.query(question, memory=memory)
+        return self._parse_albums_from_response(answer) if answer else []
+
     def _parse_albums_from_response(self, response: str) -> list[str]:
         """Parse album names from the SQL agent response."""
         albums = []
-        lines = response.split('\n')
-
-        for line in lines:
+        for line in response.split('\n'):
             line = line.strip()
-            # Skip empty lines and common non-album text
-            if not line or line.lower().startswith(('here', 'the', 'i found', 'albums:', 'album titles')):
+            # Skip empty lines and introductions like "Here are the albums by X:"
+            if not line or line.endswith(':') or line.lower().startswith(_PROSE_PREFIXES):
                 continue
-            # Remove common prefixes like "- ", "* ", numbers, etc.
-            cleaned = line.lstrip('-*•► ').strip()
-            # Remove numbering like "1. ", "2. ", etc.
-            import re
-            cleaned = re.sub(r'^\d+[\.\)]\s*', '', cleaned)
-            if cleaned and len(cleaned) > 1:
+            # Remove list markers like "- ", "* ", "1. ", "2) "
+            cleaned = _LIST_MARKER.sub('', line).strip()
+            if len(cleaned) > 1:
                 albums.append(cleaned)
 
         return albums
@@ -140,34 +201,38 @@ class MultiAgent:
         artist_name = state["artist_name"]
         albums = state.get("albums", [])
 
-        print(f"\n{'='*60}")
-        print(f"Step 2: Generating album covers")
-        print(f"{'='*60}\n")
+        self._log(f"\n{'='*60}")
+        self._log(f"Step 2: Generating album covers")
+        self._log(f"{'='*60}\n")
 
         if not albums:
-            print("⚠️  No albums found!")
+            self._log("⚠️  No albums found!")
             return {
                 "current_step": "covers_generated",
                 "messages": ["No albums to generate covers for"],
                 "generated_images": []
             }
 
-        print(f"Found {len(albums)} albums. Generating covers...\n")
+        self._log(f"Found {len(albums)} albums. Generating covers...\n")
 
         generated_images = []
         for i, album in enumerate(albums, 1):
-            print(f"\n[{i}/{len(albums)}] Generating cover for: {album}")
-            print("-" * 60)
+            self._log(f"\n[{i}/{len(albums)}] Generating cover for: {album}")
+            self._log("-" * 60)
             try:
+                # A fresh history per cover: the same album always gets the same
+                # prompt (so the response cache can replay it) and earlier covers'
+                # answers don't pile up in the prompt
                 image_path = self.image_agent.generate_cover(
                     artist=artist_name,
                     album=album,
-                    style="alternative"
+                    style="alternative",
+                    memory=InMemoryChatMessageHistory()
                 )
                 generated_images.append(Path(image_path))
-                print(f"✓ Cover generated successfully")
+                self._log(f"✓ Cover generated successfully")
             except Exception as e:
-                print(f"✗ Error generating cover: {e}")
+                self._log(f"✗ Error generating cover: {e}")
 
         return {
             "current_step": "covers_generated",
@@ -176,56 +241,42 @@ class MultiAgent:
         }
 
     def _send_email_node(self, state: AgentState) -> AgentState:
-        """Node to send email with generated images (with human-in-the-loop approval)."""
+        """Node to send email with generated images (with human-in-the-loop approval).
+
+        The approval is requested with a graph interrupt: the run is checkpointed
+        and returns immediately, and resumes here once `decide()` is called.
+        """
         artist_name = state["artist_name"]
         albums = state.get("albums", [])
         generated_images = state.get("generated_images", [])
         recipient_email = state.get("recipient_email", "")
 
-        print(f"\n{'='*60}")
-        print(f"Step 3: Sending email with album covers")
-        print(f"{'='*60}\n")
+        self._log(f"\n{'='*60}")
+        self._log(f"Step 3: Sending email with album covers")
+        self._log(f"{'='*60}\n")
 
         if not generated_images:
-            print("⚠️  No images to send!")
+            self._log("⚠️  No images to send!")
             return {
                 "current_step": "completed",
                 "messages": ["No images to send via email"]
             }
 
-        # Prepare email content
-        subject = f"Album Covers for {artist_name}"
-        body = f"""Hello!
-
-I've generated album covers for {artist_name}.
-
-This email contains {len(generated_images)} album cover(s) for the following albums:
-{chr(10).join(f"  • {album}" for album in albums)}
-
-Best regards,
-Multi-Agent System
-"""
-
-        # Preview email
-        print("📧 Email Preview:")
-        print("-" * 60)
+        body = self._build_email_body(artist_name, albums, generated_images)
         preview = self.email_agent.preview_email(
             to_email=recipient_email,
             body=body
         )
 
-        print(f"From: {preview['from']}")
-        print(f"To: {preview['to']}")
-        print(f"Subject: {preview['subject']}")
-        print(f"\nBody:\n{preview['body']}")
-        print("-" * 60)
-
-        # Human-in-the-loop: Ask for approval
-        print("\n🤔 Do you want to send this email?")
-        approval = input("Enter 'yes' to send or 'no' to cancel: ").strip().lower()
+        # Human-in-the-loop: pause until a reviewer decides
+        approved = interrupt({
+            "artist_name": artist_name,
+            "images": [str(image) for image in generated_images],
+            "preview": preview,
+        })
 
-        if approval in ['yes', 'y']:
-            print("\n✓ Email approved! Sending...")
+        if approved:
+            self._log("\n✓ Email approved! Sending...")
             success = self.email_agent.send_email(
                 to_email=recipient_email,
                 body=body,
@@ -244,26 +295,76 @@ Multi-Agent System
                     "email_approved": False
                 }
         else:
-            print("\n✗ Email cancelled by user.")
+            self._log("\n✗ Email cancelled by reviewer.")
             return {
                 "current_step": "completed",
-                "messages": ["Email sending cancelled by user"],
+                "messages": ["Email sending cancelled by reviewer"],
                 "email_approved": False
             }
 
+    def _build_email_body(self, artist_name, albums, generated_images):
+        return f"""Hello!
+
+I've generated album covers for {artist_name}.
+
+This email contains {len(generated_images)} album cover(s) for the following albums:
+{chr(10).join(f"  • {album}" for album in albums)}
+
+Best regards,
+Multi-Agent System
+"""
+
+    def _pending_interrupt(self, config):
+        """Return the interrupt payload if the run is paused, otherwise None."""
+        snapshot = self.app.get_state(config)
+        for task in snapshot.tasks:
+            if task.interrupts:
+                return task.interrupts[0].value
+        return None
+
+    def _finish_run(self, thread_id, final_state):
+        """Queue the run for review if it paused, then print the summary."""
+        pending = self._pending_interrupt(self._config(thread_id))
+        if pending is not None:
+            self.approvals.add(thread_id, pending)
+            final_state = {**final_state, "current_step": "awaiting_approval"}
+        else:
+            # Finished runs are never resumed, so their checkpoints can go
+            self.checkpointer.delete_thread(thread_id)
+
+        self._log(f"\n{'*'*60}")
+        self._log(f"Multi-Agent Workflow {'Paused' if pending is not None else 'Completed'}")
+        self._log(f"Run id: {thread_id}")
+        self._log(f"Albums processed: {len(final_state.get('albums', []))}")
+        self._log(f"Images generated: {len(final_state.get('generated_images', []))}")
+        self._log(f"Output directory: {self.output_dir}")
+        if pending is not None:
+            self._log(f"Email status: Awaiting approval (python approvals.py approve {thread_id})")
+        elif self.email_agent and final_state.get('recipient_email'):
+            email_status = "Sent" if final_state.get('email_approved', False) else "Not sent"
+            self._log(f"Email status: {email_status}")
+        self._log(f"{'*'*60}\n")
+
+        return {**final_state, "thread_id": thread_id}
+
     def run(self, artist_name: str, recipient_email: str = ""):
         """Run the multi-agent workflow.
 
+        If the email needs approval the run is checkpointed and this returns
+        right away with `current_step == "awaiting_approval"`; resume it with
+        `decide()`.
+
         Args:
             artist_name: Name of the artist to search for
             recipient_email: Email address to send the album covers to (optional)
         """
-        print(f"\n{'*'*60}")
-        print(f"Multi-Agent Workflow Started")
-        print(f"Artist: {artist_name}")
+        thread_id = str(uuid.uuid4())
+        self._log(f"\n{'*'*60}")
+        self._log(f"Multi-Agent Workflow Started")
+        self._log(f"Artist: {artist_name}")
         if recipient_email and self.email_agent:
-            print(f"Recipient: {recipient_email}")
-        print(f"{'*'*60}\n")
+            self._log(f"Recipient: {recipient_email}")
+        self._log(f"{'*'*60}\n")
 
         initial_state = {
             "artist_name": artist_name,
@@ -276,16 +377,28 @@ Multi-Agent System
         }
 
         # Run the workflow
-        final_state = self.app.invoke(initial_state)
-
-        print(f"\n{'*'*60}")
-        print(f"Multi-Agent Workflow Completed")
-        print(f"Albums processed: {len(final_state.get('albums', []))}")
-        print(f"Images generated: {len(final_state.get('generated_images', []))}")
-        print(f"Output directory: {self.image_agent.output_dir}")
-        if self.email_agent and recipient_email:
-            email_status = "Sent" if final_state.get('email_approved', False) else "Not sent"
-            print(f"Email status: {email_status}")
-        print(f"{'*'*60}\n")
+        final_state = self.app.invoke(initial_state, self._config(thread_id))
+        return self._finish_run(thread_id, final_state)
 
-        return final_state
+    def pending_approvals(self) -> list[dict]:
+        """List the runs waiting for an email approval."""
+        return self.approvals.pending()
+
+    def decide(self, thread_id: str, approved: bool):
+        """Approve or reject a paused run and resume it to completion.
+
+        Args:
+            thread_id: Run id returned by `run()` / listed by `pending_approvals()`
+            approved: Whether the email should be sent
+        """
+        # Claimed atomically, so two reviewers can't both resume (and send) the same run
+        if not self.approvals.claim(thread_id):
+            raise ValueError(f"No pending approval for run {thread_id}")
+
+        try:
+            final_state = self.app.invoke(Command(resume=approved), self._config(thread_id))
+        except BaseException:
+            self.approvals.release(thread_id)
+            raise
+        self.approvals.resolve(thread_id, approved)
+        return self._finish_run(thread_id, final_state)
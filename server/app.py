@@ -0,0 +1,367 @@
+"""Multi-tenant HTTP server for the SQL, RAG and album cover agents.
+
+Heavy resources (model clients, the DB connection pool, the RAG index) are
+loaded once at startup and shared; every session only owns its chat
+histories. Answers stream as server-sent events (`event: token` while the
+model writes, `event: tool_call` / `event: tool_result` around each tool, then
+`event: done`), or come back as JSON with `?stream=false`. For covers the
+saved path is in the `tool_result` event.
+
+    POST   /sessions                        -> {"session_id": ...}
+    DELETE /sessions/{id}
+    GET    /sessions/{id}/history
+    POST   /sessions/{id}/sql     {"question": ...}
+    POST   /sessions/{id}/rag     {"question": ...}
+    POST   /sessions/{id}/cover   {"artist": ..., "album": ..., "style": ...}
+    GET    /healthz
+    GET    /metrics                         (Prometheus text)
+
+Usage:
+    python app.py                 # real models, configured from .env
+    python app.py --offline       # fake models from benchmarks/fakes.py, no API key needed
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+from langchain_core.chat_history import InMemoryChatMessageHistory
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+ROOT = Path(__file__).parent.parent
+for folder in ("clase_1", "clase_2", "clase_3", "shared"):
+    sys.path.append(str(ROOT / folder))
+
+from registry import registry
+from instrumentation import MetricsRecorder, MetricsCallbackHandler
+from sessions import AdmissionController, Overloaded, SessionManager
+
+
+class Settings:
+    """Server configuration, read from the environment by `from_env()`."""
+
+    def __init__(self, model_name="gpt-4o-mini", db_uri=None, rag_directory=None, image_model="dall-e-3",
+                 output_dir=None, max_concurrency=8, max_queue=32, queue_timeout=30.0,
+                 session_ttl=1800, max_sessions=1000, llm_cache_path=None):
+        self.model_name = model_name
+        self.db_uri = db_uri or f"sqlite:///{ROOT / 'clase_1' / 'Chinook.db'}"
+        self.rag_directory = rag_directory
+        self.image_model = image_model
+        self.output_dir = Path(output_dir or Path(__file__).parent / "album_covers")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.llm_cache_path = llm_cache_path
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            model_name=os.getenv("MODEL_NAME", "gpt-4o-mini"),
+            db_uri=os.getenv("DB_URI"),
+            rag_directory=os.getenv("DIRECTORY_TO_SCAN"),
+            image_model=os.getenv("IMAGE_MODEL", "dall-e-3"),
+            output_dir=os.getenv("OUTPUT_DIR"),
+            max_concurrency=int(os.getenv("MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("MAX_QUEUE", "32")),
+            queue_timeout=float(os.getenv("QUEUE_TIMEOUT", "30")),
+            session_ttl=int(os.getenv("SESSION_TTL", "1800")),
+            max_sessions=int(os.getenv("MAX_SESSIONS", "1000")),
+            llm_cache_path=os.getenv("LLM_CACHE_PATH"),
+        )
+
+
+class Resources:
+    """The agents and everything heavy behind them, loaded once and shared by all sessions.
+
+    The agents' own histories are never used here: each call passes the
+    session's history instead.
+    """
+
+    def __init__(self, settings: Settings, recorder: MetricsRecorder):
+        self.settings = settings
+        self.recorder = recorder
+        self.sql_agent = None
+        self.rag_agent = None
+        self.image_agent = None
+        self.llm_cache = None
+
+    def _chat_model(self, agent):
+        if self.llm_cache is None:
+            return registry.chat_model(self.settings.model_name)
+        # The cache only replays deterministic calls, so cached agents sample at temperature 0
+        return registry.chat_model(self.settings.model_name, temperature=0, cache=self.llm_cache.namespace(agent))
+
+    def load(self):
+        from sql_agent import SQLAgent
+        from image_agent import ImageAgent
+
+        settings = self.settings
+        if settings.llm_cache_path:
+            from llm_cache import SQLiteResponseCache
+            self.llm_cache = SQLiteResponseCache(settings.llm_cache_path)
+        self.sql_agent = SQLAgent(
+            db_uri=settings.db_uri,
+            model_name=settings.model_name,
+            model=self._chat_model("sql"),
+            memory=InMemoryChatMessageHistory(),
+            callbacks=[MetricsCallbackHandler(self.recorder, agent="sql")],
+            verbose=False,
+        )
+        if settings.rag_directory:
+            from rag_agent import RagAgent
+            self.rag_agent = RagAgent(
+                model_name=settings.model_name,
+                directory=settings.rag_directory,
+                model=self._chat_model("rag"),
+                embeddings=registry.embeddings(),
+                callbacks=[MetricsCallbackHandler(self.recorder, agent="rag")],
+                verbose=False,
+            )
+        settings.output_dir.mkdir(parents=True, exist_ok=True)
+        self.image_agent = ImageAgent(
+            model_name=settings.model_name,
+            image_model=settings.image_model,
+            output_dir=settings.output_dir,
+            model=self._chat_model("cover"),
+            image_client=registry.openai_client(),
+            callbacks=[MetricsCallbackHandler(self.recorder, agent="cover")],
+            verbose=False,
+            unique_names=True,
+        )
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _string_fields(request, **defaults):
+    """Read the JSON object body and return the fields named in `defaults`, stripped.
+
+    Raises:
+        ValueError: With a message for the client if the body is not a JSON
+            object or a field is not a string
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        raise ValueError("request body must be JSON")
+    if not isinstance(body, dict):
+        raise ValueError("request body must be a JSON object")
+    fields = {}
+    for name, default in defaults.items():
+        value = body.get(name, default)
+        if not isinstance(value, str):
+            raise ValueError(f"'{name}' must be a string")
+        fields[name] = value.strip()
+    return fields
+
+
+def create_app(settings: Settings, resources: Resources = None):
+    recorder = resources.recorder if resources else MetricsRecorder()
+    resources = resources or Resources(settings, recorder)
+    sessions = SessionManager(ttl=settings.session_ttl, max_sessions=settings.max_sessions)
+    admission = AdmissionController(settings.max_concurrency, settings.max_queue, settings.queue_timeout)
+    executor = ThreadPoolExecutor(max_workers=settings.max_concurrency, thread_name_prefix="agent")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await asyncio.get_running_loop().run_in_executor(executor, resources.load)
+        evictor = asyncio.create_task(sessions.run_evictor(interval=min(30, settings.session_ttl)))
+        try:
+            yield
+        finally:
+            evictor.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_agent(request, agent, work):
+        """Admit the request, consume the agent events from `work(history)` on a worker thread and stream them."""
+        session = sessions.get(request.path_params["session_id"])
+        if session is None:
+            return JSONResponse({"error": "unknown session"}, status_code=404)
+
+        try:
+            await admission.acquire(session.lock)
+        except Overloaded as e:
+            return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        # Runs on the worker thread: forwards every event as it arrives and returns the answer
+        def forward(events):
+            answer = None
+            for kind, data in events:
+                if kind == "answer":
+                    answer = data
+                else:
+                    loop.call_soon_threadsafe(queue.put_nowait, (kind, {"text": data} if kind == "token" else data))
+            return answer
+
+        future = loop.run_in_executor(executor, forward, work(session.history(agent)))
+
+        # Released when the work finishes, even if the client has gone away
+        def release(_):
+            admission.release(session.lock)
+            session.touch()
+        future.add_done_callback(release)
+
+        if request.query_params.get("stream", "true").lower() == "false":
+            try:
+                return JSONResponse({"answer": await future})
+            except Exception as e:
+                return JSONResponse({"error": str(e)}, status_code=500)
+
+        async def events():
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield _sse(*getter.result())
+                    continue
+                getter.cancel()
+                while not queue.empty():
+                    yield _sse(*queue.get_nowait())
+                try:
+                    yield _sse("done", {"answer": future.result()})
+                except Exception as e:
+                    yield _sse("error", {"error": str(e)})
+                return
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    async def create_session(request):
+        try:
+            session = sessions.create()
+        except Overloaded as e:
+            return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+        return JSONResponse({"session_id": session.id}, status_code=201)
+
+    async def delete_session(request):
+        if not sessions.delete(request.path_params["session_id"]):
+            return JSONResponse({"error": "unknown session"}, status_code=404)
+        return JSONResponse({"deleted": True})
+
+    async def session_history(request):
+        session = sessions.get(request.path_params["session_id"])
+        if session is None:
+            return JSONResponse({"error": "unknown session"}, status_code=404)
+        return JSONResponse({
+            agent: [{"role": m.type, "content": m.content} for m in history.messages]
+            for agent, history in session.histories.items()
+        })
+
+    async def ask_sql(request):
+        try:
+            question = (await _string_fields(request, question=""))["question"]
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if not question:
+            return JSONResponse({"error": "question is required"}, status_code=400)
+        return await run_agent(
+            request, "sql",
+            lambda history: resources.sql_agent.stream(question, memory=history),
+        )
+
+    async def ask_rag(request):
+        if resources.rag_agent is None:
+            return JSONResponse({"error": "RAG is disabled (set DIRECTORY_TO_SCAN)"}, status_code=503)
+        try:
+            question = (await _string_fields(request, question=""))["question"]
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if not question:
+            return JSONResponse({"error": "question is required"}, status_code=400)
+        return await run_agent(
+            request, "rag",
+            lambda history: resources.rag_agent.stream(question, memory=history),
+        )
+
+    async def generate_cover(request):
+        try:
+            body = await _string_fields(request, artist="", album="", style="alternative")
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        artist, album, style = body["artist"], body["album"], body["style"].lower()
+        if not artist or not album:
+            return JSONResponse({"error": "artist and album are required"}, status_code=400)
+        if style not in ("original", "alternative"):
+            return JSONResponse({"error": "style must be 'original' or 'alternative'"}, status_code=400)
+        return await run_agent(
+            request, "cover",
+            lambda history: resources.image_agent.stream_cover(artist, album, style, memory=history),
+        )
+
+    def server_stats():
+        return {
+            "sessions": len(sessions.sessions),
+            "sessions_evicted": sessions.evicted,
+            "running": admission.running,
+            "waiting": admission.waiting,
+            "rejected": admission.rejected,
+        }
+
+    async def healthz(request):
+        return JSONResponse({"status": "ok", **server_stats()})
+
+    async def metrics(request):
+        gauges = "".join(f"# TYPE server_{key} gauge\nserver_{key} {value}\n" for key, value in server_stats().items())
+        return PlainTextResponse(recorder.prometheus_text() + gauges)
+
+    routes = [
+        Route("/sessions", create_session, methods=["POST"]),
+        Route("/sessions/{session_id}", delete_session, methods=["DELETE"]),
+        Route("/sessions/{session_id}/history", session_history, methods=["GET"]),
+        Route("/sessions/{session_id}/sql", ask_sql, methods=["POST"]),
+        Route("/sessions/{session_id}/rag", ask_rag, methods=["POST"]),
+        Route("/sessions/{session_id}/cover", generate_cover, methods=["POST"]),
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ]
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.sessions = sessions
+    app.state.admission = admission
+    app.state.resources = resources
+    return app
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--offline", action="store_true", help="serve fake models (benchmarks/fakes.py)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="offline: seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="offline: seconds per token")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    settings = Settings.from_env()
+    if not args.offline:
+        uvicorn.run(create_app(settings), host=args.host, port=args.port)
+        return
+
+    sys.path.append(str(ROOT / "benchmarks"))
+    from fakes import ScriptedChatModel, FakeImageClient, HashingEmbeddings, make_manuals, offline
+
+    chat_model = ScriptedChatModel(latency=args.llm_latency, token_latency=args.token_latency)
+    with tempfile.TemporaryDirectory() as tmp, offline(
+        chat_model=chat_model, embeddings=HashingEmbeddings(), image_client=FakeImageClient(latency=args.llm_latency),
+    ):
+        settings.rag_directory = settings.rag_directory or str(make_manuals(Path(tmp) / "manuals"))
+        settings.output_dir = Path(tmp) / "album_covers"
+        uvicorn.run(create_app(settings), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Load test for the agents server: requests/s and latency at several concurrency levels.
+
+Each simulated client opens its own session and sends requests back to back,
+reading the server-sent events until `done`. Start the server first, e.g.
+`python app.py --offline`.
+
+Usage:
+    python load_test.py --endpoint sql --concurrency 1 4 16 64 --requests 200
+    python load_test.py --endpoint rag --json load.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+PAYLOADS = {
+    "sql": [
+        {"question": "How many albums are there?"},
+        {"question": "Which 5 artists have the most albums?"},
+        {"question": "What are the 5 longest tracks?"},
+    ],
+    "rag": [
+        {"question": "What is the recommended tire pressure?"},
+        {"question": "How do I engage 4LO?"},
+        {"question": "How do I jump start the battery?"},
+    ],
+    "cover": [
+        {"artist": "AC/DC", "album": "Back in Black", "style": "original"},
+        {"artist": "Iron Maiden", "album": "Powerslave", "style": "alternative"},
+    ],
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+async def one_request(client, session_id, endpoint, payload):
+    """Send one request; returns (status, total seconds, seconds to first token or None)."""
+    start = time.perf_counter()
+    first_token = None
+    async with client.stream("POST", f"/sessions/{session_id}/{endpoint}", json=payload) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return response.status_code, time.perf_counter() - start, None
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter() - start
+                elif event == "error":
+                    return "error", time.perf_counter() - start, first_token
+    return 200, time.perf_counter() - start, first_token
+
+
+async def run_level(base_url, endpoint, concurrency, total):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        session_ids = []
+        for _ in range(concurrency):
+            response = await client.post("/sessions")
+            response.raise_for_status()
+            session_ids.append(response.json()["session_id"])
+
+        remaining = iter(range(total))
+        latencies, ttfts, statuses = [], [], Counter()
+
+        async def worker(session_id):
+            for i in remaining:
+                payload = PAYLOADS[endpoint][i % len(PAYLOADS[endpoint])]
+                try:
+                    status, latency, ttft = await one_request(client, session_id, endpoint, payload)
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                    continue
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(latency)
+                    if ttft is not None:
+                        ttfts.append(ttft)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(s) for s in session_ids))
+        elapsed = time.perf_counter() - start
+
+        for session_id in session_ids:
+            await client.delete(f"/sessions/{session_id}")
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": len(latencies),
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        "latency_p99_s": percentile(latencies, 99),
+        "latency_mean_s": statistics.mean(latencies) if latencies else 0.0,
+        "ttft_p50_s": percentile(ttfts, 50),
+        "ttft_p95_s": percentile(ttfts, 95),
+    }
+
+
+async def main_async(args):
+    results = []
+    print(f"{'conc':>5} {'ok':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'ttft p50':>9}  statuses")
+    for concurrency in args.concurrency:
+        result = await run_level(args.url, args.endpoint, concurrency, args.requests)
+        results.append(result)
+        print(f"{concurrency:>5} {result['ok']:>6} {result['rps']:>8.2f} "
+              f"{result['latency_p50_s'] * 1000:>7.0f}ms {result['latency_p95_s'] * 1000:>7.0f}ms "
+              f"{result['latency_p99_s'] * 1000:>7.0f}ms {result['ttft_p50_s'] * 1000:>7.0f}ms  "
+              f"{result['statuses']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=list(PAYLOADS), default="sql")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"endpoint": args.endpoint, "levels": results}, f, indent=2)
+        print(f"\nSaved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import asyncio
+import time
+import uuid
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted; the server answers 503."""
+
+
+class Session:
+    """One client's conversation state: a separate history per agent."""
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.histories = {}
+        # One request at a time per session, so its history stays in order
+        self.lock = asyncio.Lock()
+        self.created_at = self.last_used = time.monotonic()
+
+    def history(self, agent):
+        if agent not in self.histories:
+            self.histories[agent] = InMemoryChatMessageHistory()
+        return self.histories[agent]
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+
+class SessionManager:
+    """Creates sessions, and evicts them when idle or when there are too many.
+
+    Args:
+        ttl: Seconds of inactivity after which a session is evicted
+        max_sessions: Upper bound; creating one more evicts the least recently used idle session
+    """
+
+    def __init__(self, ttl=1800, max_sessions=1000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.evicted = 0
+
+    def create(self):
+        if len(self.sessions) >= self.max_sessions and not self._evict_lru():
+            raise Overloaded("too many active sessions")
+        session = Session(uuid.uuid4().hex)
+        self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.touch()
+        return session
+
+    def delete(self, session_id):
+        return self.sessions.pop(session_id, None) is not None
+
+    def _evict_lru(self):
+        idle = [s for s in self.sessions.values() if not s.lock.locked()]
+        if not idle:
+            return False
+        oldest = min(idle, key=lambda s: s.last_used)
+        del self.sessions[oldest.id]
+        self.evicted += 1
+        return True
+
+    def evict_idle(self):
+        """Drop sessions unused for longer than `ttl`; returns how many were dropped."""
+        cutoff = time.monotonic() - self.ttl
+        stale = [s.id for s in self.sessions.values() if s.last_used < cutoff and not s.lock.locked()]
+        for session_id in stale:
+            del self.sessions[session_id]
+        self.evicted += len(stale)
+        return len(stale)
+
+    async def run_evictor(self, interval=30):
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+
+class AdmissionController:
+    """Bounds how many agent calls run at once and how many may wait for a slot.
+
+    Requests beyond `max_concurrency` queue; once `max_queue` are already
+    waiting, or a request waits longer than `queue_timeout`, it is rejected
+    with Overloaded instead of piling up. Waiting for the session's previous
+    request to finish counts as queueing too.
+    """
+
+    def __init__(self, max_concurrency=8, max_queue=32, queue_timeout=30.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self, session_lock=None):
+        """Take `session_lock` (if given) and then a worker slot, within `queue_timeout` overall."""
+        busy = self._semaphore.locked() or (session_lock is not None and session_lock.locked())
+        if busy and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded("request queue is full")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        self.waiting += 1
+        try:
+            if session_lock is not None:
+                await asyncio.wait_for(session_lock.acquire(), self.queue_timeout)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                if session_lock is not None:
+                    session_lock.release()
+                raise
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded("timed out waiting for a free worker")
+        finally:
+            self.waiting -= 1
+        self.running += 1
+
+    def release(self, session_lock=None):
+        self.running -= 1
+        self._semaphore.release()
+        if session_lock is not None:
+            session_lock.release()
@@ -0,0 +1,70 @@
+"""Streams one question through a LangChain agent as (kind, data) events.
+
+Shared by SQLAgent, RagAgent and ImageAgent. The events are:
+
+    ("token", str)         a piece of the model's text, as soon as it is written
+    ("tool_call", dict)    {"name", "args"} when the model calls a tool
+    ("tool_result", dict)  {"name", "content"} when the tool returns
+    ("answer", str)        the final answer, always last (None if there was none)
+"""
+
+# Graph node that runs the agent's own model in `create_agent`; chat models
+# called from elsewhere (e.g. inside a tool) are not the answer being written
+MODEL_NODE = "model"
+
+_ROLES = {"human": "user", "ai": "assistant", "system": "system", "tool": "tool"}
+
+
+def history_messages(memory):
+    """The chat history as role/content dicts, the input the agents are given."""
+    return [{"role": _ROLES.get(m.type, "user"), "content": m.content or ""} for m in memory.messages]
+
+
+def stream_events(agent, input_messages, config=None, verbose=False):
+    """Run `agent` on `input_messages` and yield its events as they happen.
+
+    "updates" delivers only the messages each step added, instead of the
+    whole conversation again, and "messages" delivers the model's tokens.
+    """
+    answer = None
+    stream = agent.stream({"messages": input_messages}, config, stream_mode=["updates", "messages"])
+    for mode, chunk in stream:
+        if mode == "messages":
+            token, metadata = chunk
+            if (metadata.get("langgraph_node") == MODEL_NODE and token.type in ("AIMessageChunk", "ai")
+                    and isinstance(token.content, str) and token.content):
+                yield "token", token.content
+            continue
+        for update in chunk.values():
+            # Non-node entries such as "__interrupt__" carry no messages
+            if not isinstance(update, dict):
+                continue
+            for message in update.get("messages", []):
+                if verbose:
+                    message.pretty_print()
+                if message.type == "ai" and message.tool_calls:
+                    for call in message.tool_calls:
+                        yield "tool_call", {"name": call["name"], "args": call["args"]}
+                elif message.type == "ai" and message.content:
+                    answer = message.content if isinstance(message.content, str) else str(message.content)
+                elif message.type == "tool":
+                    yield "tool_result", {"name": message.name, "content": message.content}
+    yield "answer", answer
+
+
+def stream_turn(agent, memory, question, config=None, verbose=False):
+    """Add `question` to `memory`, stream the agent's events, and save its answer.
+
+    Only the final answer is saved; the intermediate tool-calling turns would
+    otherwise be re-added to the history on every question.
+    """
+    memory.add_user_message(question)
+    answer = None
+    for kind, data in stream_events(agent, history_messages(memory), config, verbose):
+        if kind == "answer":
+            answer = data
+        else:
+            yield kind, data
+    if answer is not None:
+        memory.add_ai_message(answer)
+    yield "answer", answer
@@ -0,0 +1,264 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class MetricsRecorder:
+    """Collects per-call metrics and exports them as JSONL or Prometheus text.
+
+    Every LLM call, tool call and graph node produces one event dict:
+
+        {"kind": "llm" | "tool" | "node", "name": ..., "agent": ...,
+         "wall_s": ..., "ttft_s": ..., "prompt_tokens": ...,
+         "completion_tokens": ..., "cached_tokens": ..., "cache_hit": ...,
+         "error": ...}
+
+    Totals are kept up to date as events arrive, so `summary()` and a
+    Prometheus scrape cost the same however long the process has run. Only
+    the most recent `max_events` raw events stay in memory; the JSONL file
+    has them all.
+
+    Args:
+        jsonl_path: If given, each event is also appended to this file
+        max_events: How many raw events to keep in `events` (None keeps all)
+    """
+
+    def __init__(self, jsonl_path=None, max_events=10000):
+        self.events = deque(maxlen=max_events)
+        self._totals = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+        self._server = None
+
+    def record(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+            self._add_to_totals(event)
+            if self._jsonl:
+                self._jsonl.write(json.dumps(event, default=str) + "\n")
+
+    def _add_to_totals(self, event):
+        bucket = self._totals[(event["kind"], event["name"], event.get("agent") or "")]
+        bucket["calls"] += 1
+        bucket["errors"] += 1 if event.get("error") else 0
+        bucket["wall_s"] += event.get("wall_s") or 0.0
+        if event.get("ttft_s") is not None:
+            bucket["ttft_s"] += event["ttft_s"]
+            bucket["ttft_count"] += 1
+        bucket["prompt_tokens"] += event.get("prompt_tokens") or 0
+        bucket["completion_tokens"] += event.get("completion_tokens") or 0
+        bucket["cached_tokens"] += event.get("cached_tokens") or 0
+        bucket["cache_hits"] += 1 if event.get("cache_hit") else 0
+
+    def reset(self):
+        """Forget the events and totals recorded so far (e.g. after a warmup)."""
+        with self._lock:
+            self.events.clear()
+            self._totals.clear()
+
+    def export_jsonl(self, path):
+        """Write the events still held in memory to `path`, one JSON object per line."""
+        with self._lock, open(path, "w", encoding="utf-8") as f:
+            for event in self.events:
+                f.write(json.dumps(event, default=str) + "\n")
+
+    def flush(self):
+        if self._jsonl:
+            with self._lock:
+                self._jsonl.flush()
+
+    def close(self):
+        if self._jsonl:
+            with self._lock:
+                self._jsonl.close()
+                self._jsonl = None
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+    def summary(self) -> dict:
+        """Totals by (kind, name, agent), over every event recorded."""
+        with self._lock:
+            return {key: defaultdict(float, bucket) for key, bucket in self._totals.items()}
+
+    def prometheus_text(self) -> str:
+        """Render the aggregated metrics in the Prometheus text exposition format."""
+        buckets = [
+            (f'kind="{kind}",name="{_escape(name)}",agent="{_escape(agent)}"', b)
+            for (kind, name, agent), b in sorted(self.summary().items())
+        ]
+        # Each family's TYPE line is followed by all of that family's samples
+        lines = ["# TYPE agent_calls_total counter"]
+        lines += [f"agent_calls_total{{{labels}}} {b['calls']:g}" for labels, b in buckets]
+        lines.append("# TYPE agent_errors_total counter")
+        lines += [f"agent_errors_total{{{labels}}} {b['errors']:g}" for labels, b in buckets]
+        lines.append("# TYPE agent_cache_hits_total counter")
+        lines += [f"agent_cache_hits_total{{{labels}}} {b['cache_hits']:g}" for labels, b in buckets]
+        lines.append("# TYPE agent_duration_seconds summary")
+        for labels, b in buckets:
+            lines.append(f"agent_duration_seconds_sum{{{labels}}} {b['wall_s']:.6f}")
+            lines.append(f"agent_duration_seconds_count{{{labels}}} {b['calls']:g}")
+        lines.append("# TYPE agent_ttft_seconds summary")
+        for labels, b in buckets:
+            if b["ttft_count"]:
+                lines.append(f"agent_ttft_seconds_sum{{{labels}}} {b['ttft_s']:.6f}")
+                lines.append(f"agent_ttft_seconds_count{{{labels}}} {b['ttft_count']:g}")
+        lines.append("# TYPE agent_tokens_total counter")
+        for labels, b in buckets:
+            for token_type in ("prompt", "completion", "cached"):
+                value = b[f"{token_type}_tokens"]
+                if value:
+                    lines.append(f'agent_tokens_total{{{labels},type="{token_type}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port=9464, host="127.0.0.1"):
+        """Expose `prometheus_text()` at http://host:port/metrics from a daemon thread."""
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = recorder.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler that times LLM calls, tool calls and graph nodes.
+
+    Pass it in the `callbacks` of an agent (or of a graph invocation) and it
+    records one event per call into `recorder`.
+
+    Args:
+        recorder: Where events are stored
+        agent: Label added to every event, e.g. "sql" or "image"
+    """
+
+    def __init__(self, recorder: MetricsRecorder, agent=None):
+        self.recorder = recorder
+        self.agent = agent
+        self._runs = {}
+
+    def _start(self, run_id, kind, name):
+        self._runs[run_id] = {"kind": kind, "name": name, "start": time.perf_counter(), "first_token": None}
+
+    def _end(self, run_id, error=None, **fields):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        end = time.perf_counter()
+        first_token = run["first_token"]
+        self.recorder.record({
+            "kind": run["kind"],
+            "name": run["name"],
+            "agent": self.agent,
+            "ts": time.time(),
+            "wall_s": end - run["start"],
+            "ttft_s": first_token - run["start"] if first_token is not None else None,
+            "error": repr(error) if error is not None else None,
+            **fields,
+        })
+
+    # LLM calls
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        name = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "chat_model"
+        self._start(run_id, "llm", name)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        name = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "llm"
+        self._start(run_id, "llm", name)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, **_token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # Tool calls
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # Graph nodes: LangGraph tags each node run with metadata["langgraph_node"];
+    # only the node itself (not the runnables inside it) carries the node's name.
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        # A node pausing for human approval raises GraphInterrupt; that is not a failure
+        if type(error).__name__ == "GraphInterrupt":
+            self._end(run_id, interrupted=True)
+        else:
+            self._end(run_id, error=error)
+
+
+def _token_usage(response):
+    """Extract token counts from an LLMResult, whichever way the provider reports them.
+
+    `cache_hit` means the response came from the response cache (llm_cache.py),
+    so no tokens were spent; `cached_tokens` counts provider-side prompt caching.
+    """
+    generations = [g for batch in response.generations for g in batch]
+    messages = [g.message for g in generations if getattr(g, "message", None) is not None]
+    if generations and all((g.generation_info or {}).get("cache_hit") for g in generations):
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cache_hit": True}
+
+    prompt_tokens = completion_tokens = cached_tokens = 0
+    found = False
+    for message in messages:
+        usage = message.usage_metadata if hasattr(message, "usage_metadata") else None
+        if usage:
+            found = True
+            prompt_tokens += usage.get("input_tokens", 0)
+            completion_tokens += usage.get("output_tokens", 0)
+            cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0)
+    if not found:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "cache_hit": False,
+    }
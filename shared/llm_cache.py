@@ -0,0 +1,218 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation
+
+_TEMPERATURE = re.compile(r"""['"]temperature['"]\s*[:,]\s*([0-9.]+)""")
+_N = re.compile(r"""['"]n['"]\s*[:,]\s*([0-9]+)""")
+# What most providers sample at when no temperature is set
+_DEFAULT_TEMPERATURE = 1.0
+# The only classes a stored response may deserialize to
+_CACHED_OBJECTS = [Generation, ChatGeneration, ChatGenerationChunk, AIMessage, AIMessageChunk]
+
+
+def _normalize_prompt(prompt):
+    """Reduce LangChain's serialized prompt to what the model actually sees.
+
+    The raw prompt also carries metadata (response_metadata, usage with
+    `total_cost`, ...) that differs between a cold run and a replayed one, so
+    keying on it would stop every later step of an agent run from hitting.
+    """
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    normalized = []
+    for message in messages:
+        if not isinstance(message, dict):
+            return prompt
+        kwargs = message.get("kwargs") or {}
+        normalized.append({
+            "type": (message.get("id") or [kwargs.get("type")])[-1],
+            "content": kwargs.get("content"),
+            "tool_calls": [
+                {"name": call.get("name"), "args": call.get("args"), "id": call.get("id")}
+                for call in kwargs.get("tool_calls") or []
+            ],
+            "tool_call_id": kwargs.get("tool_call_id"),
+            "name": kwargs.get("name"),
+        })
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class _Store:
+    """SQLite table and counters shared by every namespace of one cache file."""
+
+    def __init__(self, path, max_entries, ttl):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0})
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                expires_at REAL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+        self.conn.commit()
+
+
+class SQLiteResponseCache(BaseCache):
+    """Exact-match cache of chat model responses, stored in SQLite.
+
+    Plug it into any LangChain chat model (`init_chat_model(name, cache=cache)`
+    or `registry.chat_model(name, cache=cache)`). Responses are keyed on the
+    model, its parameters, the bound tool schemas (all part of LangChain's
+    `llm_string`) and the prompt messages' type, content, tool calls, tool
+    call id and name.
+
+    Only deterministic calls are cached: with the default `max_temperature`
+    of 0, a model needs an explicit `temperature=0`, since an unset
+    temperature means the provider default (1.0). A hit is reported in the
+    generation's `generation_info["cache_hit"]`, which never reaches the
+    message that goes back into the conversation.
+
+    Args:
+        path: SQLite file, shared between processes and runs
+        namespace: Keeps each agent's entries and hit counts apart
+        max_entries: Least recently used entries beyond this are evicted
+        ttl: Seconds an entry stays valid (None = forever)
+        max_temperature: Calls sampling at a higher temperature bypass the cache (None = no limit)
+        bypass: Extra rule, `bypass(prompt, llm_string) -> bool`
+    """
+
+    def __init__(self, path, namespace="default", max_entries=10_000, ttl=7 * 24 * 3600,
+                 max_temperature=0.0, bypass=None, _store=None):
+        self._store = _store or _Store(path, max_entries, ttl)
+        self.namespace_name = namespace
+        self.max_temperature = max_temperature
+        self.bypass = bypass
+        self._views = {}
+
+    def __repr__(self):
+        return f"SQLiteResponseCache({self._store.path!r}, namespace={self.namespace_name!r})"
+
+    def namespace(self, name):
+        """Return a view of the same cache file under another namespace (e.g. per agent)."""
+        if name not in self._views:
+            self._views[name] = SQLiteResponseCache(
+                self._store.path, namespace=name, max_temperature=self.max_temperature,
+                bypass=self.bypass, _store=self._store,
+            )
+        return self._views[name]
+
+    def _key(self, prompt, llm_string):
+        raw = "\x1f".join((self.namespace_name, llm_string, _normalize_prompt(prompt)))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _should_bypass(self, prompt, llm_string):
+        # Several completions per call, or sampling hotter than allowed, are not
+        # meant to repeat; neither is anything a custom rule excludes
+        n = _N.search(llm_string)
+        if n and int(n.group(1)) > 1:
+            return True
+        if self.max_temperature is not None:
+            match = _TEMPERATURE.search(llm_string)
+            temperature = float(match.group(1)) if match else _DEFAULT_TEMPERATURE
+            if temperature > self.max_temperature:
+                return True
+        return bool(self.bypass and self.bypass(prompt, llm_string))
+
+    def lookup(self, prompt, llm_string):
+        store = self._store
+        stats = store.stats[self.namespace_name]
+        if self._should_bypass(prompt, llm_string):
+            stats["bypassed"] += 1
+            return None
+
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with store.lock:
+            row = store.conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] < now:
+                store.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                store.conn.commit()
+                stats["evictions"] += 1
+                row = None
+            if row is None:
+                stats["misses"] += 1
+                return None
+            store.conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            store.conn.commit()
+            stats["hits"] += 1
+
+        generations = loads(row[0], allowed_objects=_CACHED_OBJECTS)
+        for generation in generations:
+            generation.generation_info = {**(generation.generation_info or {}), "cache_hit": True}
+        return generations
+
+    def update(self, prompt, llm_string, return_val):
+        if self._should_bypass(prompt, llm_string):
+            return
+        store = self._store
+        now = time.time()
+        expires_at = now + store.ttl if store.ttl else None
+        with store.lock:
+            store.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, namespace, value, created_at, last_used, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), self.namespace_name, dumps(return_val), now, now, expires_at),
+            )
+            store.stats[self.namespace_name]["stores"] += 1
+            self._evict(now)
+            store.conn.commit()
+
+    def _evict(self, now):
+        store = self._store
+        expired = store.conn.execute(
+            "DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        ).rowcount
+        (count,) = store.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = max(0, count - store.max_entries)
+        if overflow:
+            store.conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+        store.stats[self.namespace_name]["evictions"] += expired + overflow
+
+    def clear(self, **kwargs):
+        """Remove this namespace's entries."""
+        with self._store.lock:
+            self._store.conn.execute("DELETE FROM llm_cache WHERE namespace = ?", (self.namespace_name,))
+            self._store.conn.commit()
+
+    def stats(self) -> dict:
+        """Per-namespace counters; `hits` is the number of LLM calls the cache saved."""
+        result = {}
+        for namespace, counters in self._store.stats.items():
+            lookups = counters["hits"] + counters["misses"]
+            result[namespace] = {
+                **counters,
+                "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+                "llm_calls_saved": counters["hits"],
+            }
+        return result
@@ -0,0 +1,56 @@
+import threading
+
+
+class ModelRegistry:
+    """Process-wide cache of chat models, embeddings and API clients.
+
+    Agents that ask for the same configuration get the same instance, so a
+    process holds one client (and one connection pool) per configuration
+    instead of one per agent. Instances are built on first use, and the
+    langchain/openai packages are only imported at that point.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind, name, kwargs):
+        return (kind, name, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+    def _get_or_create(self, key, factory):
+        instance = self._instances.get(key)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if key not in self._instances:
+                self._instances[key] = factory()
+            return self._instances[key]
+
+    def chat_model(self, model_name, **kwargs):
+        """Shared `init_chat_model(model_name, **kwargs)`."""
+        def factory():
+            from langchain.chat_models import init_chat_model
+            return init_chat_model(model_name, **kwargs)
+        return self._get_or_create(self._key("chat", model_name, kwargs), factory)
+
+    def embeddings(self, model="text-embedding-3-large", **kwargs):
+        """Shared `OpenAIEmbeddings(model=model, **kwargs)`."""
+        def factory():
+            from langchain_openai import OpenAIEmbeddings
+            return OpenAIEmbeddings(model=model, **kwargs)
+        return self._get_or_create(self._key("embeddings", model, kwargs), factory)
+
+    def openai_client(self, **kwargs):
+        """Shared `openai.OpenAI(**kwargs)` client, e.g. for image generation."""
+        def factory():
+            from openai import OpenAI
+            return OpenAI(**kwargs)
+        return self._get_or_create(self._key("openai", None, kwargs), factory)
+
+    def clear(self):
+        with self._lock:
+            self._instances.clear()
+
+
+registry = ModelRegistry()